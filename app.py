@@ -1,240 +1,392 @@
-import os
 import json
-import pdfplumber
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from fpdf import FPDF
-from openai import OpenAI
+from cache import cache_key, get_response_cache
+from chunking import CHUNK_TOKENS, merge_partials, split_into_chunks
+from jobs import get_job_runner
+from llm_client import create_chat_completion
+from metrics import record_cache_status, record_llm_call, record_page_timings, scoped, timed_stage, track_run
+from pdf_text import extract_pages
+from profile_store import content_hash, get_profile_store, prompt_version
+from prompts import (
+    ANALYSIS_JSON_SCHEMA,
+    CV_JSON_SCHEMA,
+    ENRICH_TEMPLATES,
+    JD_JSON_SCHEMA,
+    PARSE_TEMPLATES,
+    buildAnalysis_prompt,
+    buildCV_enrichment_prompt,
+    buildCV_prompt,
+    buildCV_single_pass_prompt,
+    buildFlagging_prompt,
+    buildJD_enrichment_prompt,
+    buildJD_prompt,
+    buildJD_single_pass_prompt,
+    buildQuestionnaire_prompt,
+    strict_response_format,
+)
+from reports import candidate_section, memoized, render_combined_report, run_artifacts
+from routing import Escalate, run_cascade, stage_models
+from prompt_budget import PROMPT_BUDGETS
 
 # STEP 1: Load PDF and extract text
-def extract_text_from_pdf(file_path):
-    with pdfplumber.open(file_path) as pdf:
-        return "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-
-# STEP 2: Define JSON schema and prompts
-def buildCV_prompt(resume_text):
-    json_schema = {
-        "name": "",
-        "email": "",
-        "phone": "",
-        "country": "",
-        "city": "",
-        "summary": "",
-        "skills": [
-            {
-                'specialized skill': "",
-                'common skill': ""
-            }
-        ],
-        "experience": [
-            {
-                "job_title": "",
-                "company": "",
-                "start_date": "",
-                "end_date": "",
-                "description": ""
-            }
-        ],
-        "education": [
-            {
-                "degree": "",
-                "institution": "",
-                "start_year": "",
-                "end_year": ""
-            }
-        ],
-       "enrichment parameters": [
-            {
-                "Employment Pattern & Progression": "",
-                "Company Type & Sector": "",
-                "Education Quality & Ranking": "",
-                "Skill Demand & Market Relevance": "",
-                "Leadership Experience": "",
-                "Budget & Project Management": "",
-                "International Experience & Mobility": "",
-                "Soft Skills from Sales Calls": "",
-                "Personality & Behavioral Traits": [
-                    {
-                    "Openness": "",
-                    "Conscientiousness": "",
-                    "Extraversion": "",
-                    "Agreeableness": "",
-                    "Neuroticism": ""
-                    }
-                ],
-                "Future Career Goals (Sales-Inferred)": "",
-                "Salary Expectations (Sales-Inferred)": "",
-                "JD Enrichment with Implied Preferences": "",
-                "Cultural Fit Indicators": ""
-            }
-        ]
-    }
+def extract_page_texts(source):
+    # source is a file path or the raw PDF bytes
+    pages, cached = extract_pages(source)
+    record_cache_status(cached)
+    if not cached:
+        record_page_timings(page["seconds"] for page in pages)
+    return [page["text"] for page in pages if page["text"]]
 
-    prompt = f"""
-You are an expert resume parser. Convert the resume text below into this JSON format. Fill in all the relevant fields. Leave the enrichment_parameters field empty.
-The JSON schema is as follows:
-
-{json.dumps(json_schema, indent=2)}
-
-Resume:
-\"\"\"
-{resume_text}
-\"\"\"
-"""
-    return prompt
-
-def buildJD_prompt(job_description_text):
-    json_schema = {
-        "country": "",
-        "city": "",
-        "summary": "",
-        "skills": [
-            {
-                'specialized skill': "",
-                'common skill': ""
-            }
-        ],
-        "experience": [
-            {
-                "job_title": "",
-                "company": "",
-                "start_date": "",
-                "end_date": "",
-                "description": ""
-            }
-        ],
-        "education": [
-            {
-                "degree": "",
-                "institution": "",
-                "start_year": "",
-                "end_year": ""
-            }
-        ],
-       "enrichment parameters": [
-            {
-                "Employment Pattern & Progression": "",
-                "Company Type & Sector": "",
-                "Education Quality & Ranking": "",
-                "Skill Demand & Market Relevance": "",
-                "Leadership Experience": "",
-                "Budget & Project Management": "",
-                "International Experience & Mobility": "",
-                "Soft Skills from Sales Calls": "",
-                "Future Career Goals (Sales-Inferred)": "",
-                "Salary Expectations (Sales-Inferred)": "",
-                "JD Enrichment with Implied Preferences": "",
-                "Cultural Fit Indicators": ""
-            }
-        ]
-    }
+def extract_text_from_pdf(source):
+    return "\n".join(extract_page_texts(source))
+
+# STEP 2 and 3: JSON schemas and prompts are defined in prompts.py, which is
+# imported once per process instead of being rebuilt on every Streamlit rerun
 
-    prompt = f"""
-You are an expert Job description parser. Convert the job description text below into this JSON format. Fill in all the relevant fields. Leave the enrichment parameters field empty.
-Note that the json schema resembles a resume schema. 
-This is because the end goal is to match the resume with the job description. 
-However, keep in mind that the schema is to be filled with the job description data.
-Again, the enrichment parameters field should be left empty.
-The JSON schema is as follows:
-
-{json.dumps(json_schema, indent=2)}
-
-Job Description:
-\"\"\"
-{job_description_text}
-\"\"\"
-"""
-    return prompt
-
-# STEP 3: Build enrichment prompts
-def buildCV_enrichment_prompt(cv_data):
-    prompt = f"""
-You are an expert in CV enrichment. Analyze the provided CV data and infer the following enrichment parameters:
-- Employment Pattern & Progression: Describe the career trajectory and progression.
-- Company Type & Sector: Identify the type and sector of companies worked for.
-- Education Quality & Ranking: Assess the quality and ranking of educational institutions.
-- Skill Demand & Market Relevance: Evaluate the relevance of skills in the current market.
-- Leadership Experience: Highlight leadership roles and responsibilities.
-- Budget & Project Management: Detail experience in managing budgets and projects.
-- International Experience & Mobility: Indicate international exposure and mobility.
-- Soft Skills from Sales Calls: Infer soft skills demonstrated in sales or communication.
-- Personality & Behavioral Traits: Deduce personality traits and behaviors.
-- Future Career Goals (Sales-Inferred): Predict future career aspirations based on sales roles.
-- Salary Expectations (Sales-Inferred): Estimate salary expectations based on experience.
-- JD Enrichment with Implied Preferences: Enrich job descriptions with implied preferences.
-- Cultural Fit Indicators: Suggest cultural fit indicators for potential roles.
-
-Also, analyze the candidate's Personality & Behavioral Traits according to the Big Five (OCEAN) model. Use the resume's tone, accomplishments, language, career path and the above inferred enrichment parameters to estimate the following traits:
-Personality & Behavioral Traits: 
-    "Openness": "How open is the candidate to new experiences and ideas?"
-    "Conscientiousness": "How organized and dependable is the candidate?"
-    "Extraversion": "How outgoing and energetic is the candidate?"
-    "Agreeableness": "How friendly and compassionate is the candidate?"
-    "Neuroticism": "How emotionally stable is the candidate?"
-
-For each Personality and Behavioral Trait, provide a rating (High, Moderate, or Low).
-
-Here is the CV data:
-{json.dumps(cv_data, indent=2)}
-
-Please analyze and fill in the enrichment parameters. Return the enriched CV data in JSON format. Please respond ONLY with raw JSON. Do not include explanations, markdown, or code block formatting.
-
-"""
-    return prompt
-
-def buildJD_enrichment_prompt(jd_data):
-    prompt = f"""
-You are an expert in Job Description enrichment. Analyze the provided Job description data and infer the following enrichment parameters:
-- Employment Pattern & Progression: Describe the required career trajectory and progression for an ideal candidate.
-- Company Type & Sector: Identify the type and sector of company.
-- Education Quality & Ranking: potential quality and ranking of educational institutions of the candidate.
-- Skill Demand & Market Relevance: Evaluate the relevance of skills in the current market.
-- Leadership Experience: Highlight leadership roles and responsibilities for a potential candidate.
-- Budget & Project Management: Detail experience in managing budgets and projects.
-- International Experience & Mobility: Indicate international exposure and mobility for a potential candidate.
-- Soft Skills from Sales Calls: Infer soft skills demonstrated in sales or communication.
-- Personality & Behavioral Traits: Deduce personality traits and behaviors for this role.
-- Future Career Goals (Sales-Inferred): Predict future career aspirations based on sales roles.
-- Salary Expectations (Sales-Inferred): Estimate salary expectations for this role.
-- JD Enrichment with Implied Preferences: leave this empty
-- Cultural Fit Indicators: Suggest cultural fit indicators for potential candidates.
-
-Also, analyze a potential candidate's Personality & Behavioral Traits according to the Big Five (OCEAN) model. Use the job description's tone, requiremets, language and the above inferred enrichment parameters to estimate the following traits:
-Personality & Behavioral Traits: 
-    "Openness": "How open is the candidate to new experiences and ideas?"
-    "Conscientiousness": "How organized and dependable is the candidate?"
-    "Extraversion": "How outgoing and energetic is the candidate?"
-    "Agreeableness": "How friendly and compassionate is the candidate?"
-    "Neuroticism": "How emotionally stable is the candidate?"
-
-For each Personality and Behavioral Trait, provide a rating (High, Moderate, or Low).
-
-Here is the job description data:
-{json.dumps(jd_data, indent=2)}
-
-Please analyze and fill in the enrichment parameters. Return the enriched job description data in JSON format. Please respond ONLY with raw JSON. Do not include explanations, markdown, or code block formatting.
-
-"""
-    return prompt
+# Plain-text renderings of the structured analysis, used for the PDFs and the run history
+def format_analysis(analysis):
+    flagging_lines = ["Overview", "", analysis.get("overview", ""), "", "Key Missing Information:"]
+    for item in analysis.get("missing_information", []):
+        flagging_lines.append(f"- {item.get('point', '')}: {item.get('why_it_matters', '')}")
+    questionnaire_lines = [
+        f"{number}. {item.get('question', '')}"
+        for number, item in enumerate(analysis.get("interview_questions", []), start=1)
+    ]
+    return "\n".join(flagging_lines), "\n".join(questionnaire_lines)
 
 # STEP 4: OpenAI API calls
-def call_openai(prompt, api_key):
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model="gpt-4",
+# The model for each stage comes from routing.MODEL_ROUTES
+# With validate, the parsed result is returned and the answer is cached only once
+# it has been judged: malformed output is never replayed, while an answer sent on
+# to a larger model (or used anyway by the last one) replays the same verdict
+def _chat_completion(prompt, api_key, use_cache=True, model="gpt-4", temperature=0, response_format=None, validate=None):
+    cache = get_response_cache()
+    key = cache_key(model, temperature, prompt, response_format)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            record_llm_call(model, cached=True)
+            return validate(cached) if validate is not None else cached
+
+    options = {"response_format": response_format} if response_format else {}
+    response = create_chat_completion(
+        api_key,
+        model=model,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0
+        temperature=temperature,
+        **options
     )
-    return response.choices[0].message.content
+    content = response.choices[0].message.content
+    if response.usage is not None:
+        record_llm_call(model, response.usage.prompt_tokens, response.usage.completion_tokens)
+    else:
+        record_llm_call(model)
+    # Store even when bypassing the lookup so a forced refresh updates the entry
+    try:
+        result = validate(content) if validate is not None else content
+    except Escalate:
+        cache.put(key, content)
+        raise
+    cache.put(key, content)
+    return result
+
+# Yield the completion text as it arrives; cached answers are yielded whole
+def stream_openai(prompt, api_key, use_cache=True, stage="flagging", temperature=0):
+    model = stage_models(stage)[0]
+    cache = get_response_cache()
+    key = cache_key(model, temperature, prompt)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            record_llm_call(model, cached=True)
+            yield cached
+            return
 
-def call_openai_for_enrichment(prompt, api_key):
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model="gpt-4",
+    stream = create_chat_completion(
+        api_key,
+        model=model,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    parts = []
+    usage = None
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield parts[-1]
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage  # Only the final chunk carries usage
+    if usage is not None:
+        record_llm_call(model, usage.prompt_tokens, usage.completion_tokens)
+    else:
+        record_llm_call(model)
+    cache.put(key, "".join(parts))
+
+# Output checks that decide whether a cascade moves on to the next model
+def _has_content(value):
+    if isinstance(value, dict):
+        return any(_has_content(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_has_content(item) for item in value)
+    return value not in ("", None)
+
+def schema_mismatch(data, template, path="$"):
+    # Where data first departs from an example template, or None if it follows it
+    if isinstance(template, dict):
+        if not isinstance(data, dict):
+            return path
+        for key, value in template.items():
+            if key not in data:
+                return f"{path}.{key}"
+            mismatch = schema_mismatch(data[key], value, f"{path}.{key}")
+            if mismatch:
+                return mismatch
+        return None
+    if isinstance(template, list):
+        if not isinstance(data, list):
+            return path
+        for index, item in enumerate(data):
+            mismatch = schema_mismatch(item, template[0], f"{path}[{index}]")
+            if mismatch:
+                return mismatch
+        return None
+    return None if data is None or isinstance(data, (str, int, float)) else path
+
+def _parsed_anything(data):
+    return any(_has_content(value) for key, value in data.items() if key != "enrichment parameters")
+
+def _enriched_anything(data):
+    return _has_content(data.get("enrichment parameters"))
+
+# An empty answer from the cheap model is treated as low confidence
+STAGE_CHECKS = {
+    "parse": _parsed_anything,
+    "enrich": _enriched_anything,
+    "single_pass": lambda data: _parsed_anything(data) and _enriched_anything(data),
+    "analysis": lambda data: all(_has_content(data.get(key)) for key in ANALYSIS_JSON_SCHEMA),
+}
+def json_validator(stage, template=None, check_content=True):
+    def validate(content):
+        data = parse_json_response(content)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        mismatch = schema_mismatch(data, template) if template is not None else None
+        if mismatch:
+            raise Escalate(f"does not match the schema at {mismatch}", data)
+        if check_content and stage in STAGE_CHECKS and not STAGE_CHECKS[stage](data):
+            raise Escalate("low confidence: no content", data)
+        return data
+    return validate
+
+def call_openai_json(stage, prompt, api_key, use_cache=True, template=None, check_content=True):
+    validate = json_validator(stage, template, check_content)
+    return run_cascade(
+        stage,
+        lambda model: _chat_completion(prompt, api_key, use_cache=use_cache, model=model, validate=validate),
+    )
+
+def call_openai_for_enrichment(prompt, api_key, use_cache=True, kind=None):
+    # The answer holds only the enrichment parameters; see merge_enrichment
+    return call_openai_json("enrich", prompt, api_key, use_cache, ENRICH_TEMPLATES.get(kind))
+
+# The enrichment prompt may send a compacted copy of the parse, so only the
+# enrichment parameters are taken from the answer and the parse is kept whole
+def merge_enrichment(parsed, answer):
+    enrichment = answer.get("enrichment parameters", parsed.get("enrichment parameters", []))
+    return dict(parsed, **{"enrichment parameters": enrichment})
+
+def call_openai_structured(prompt, api_key, schema_name, template, use_cache=True, stage="single_pass"):
+    response_format = strict_response_format(schema_name, template)
+    validate = json_validator(stage, template)
+    return run_cascade(
+        stage,
+        lambda model: _chat_completion(prompt, api_key, use_cache=use_cache, model=model, response_format=response_format,
+                                       validate=validate),
     )
-    enriched_cv_content = response.choices[0].message.content
-    return json.loads(enriched_cv_content)  # Assuming the response is valid JSON
+
+# Tolerate markdown fences or stray prose around a JSON object
+def parse_json_response(content):
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start:end + 1])
+
+# STEP 5: Run the CV and JD chains concurrently
+class StageError(Exception):
+    def __init__(self, stage, error):
+        super().__init__(f"{stage} stage failed: {error}")
+        self.stage = stage
+        self.error = error
+
+# Prompt templates rendered with empty input identify the prompt and schema version,
+# so stored profiles are only reused while the prompts that produced them are unchanged
+def document_versions(build_prompt, build_enrichment_prompt, compact_prompts=False):
+    budget = PROMPT_BUDGETS["enrich"] if compact_prompts else None
+    parse_version = prompt_version(build_prompt(""), *stage_models("parse"))
+    enrich_version = prompt_version(build_enrichment_prompt({}, budget), budget, *stage_models("enrich"))
+    return parse_version, enrich_version
+
+def process_document(source, build_prompt, build_enrichment_prompt, api_key, use_cache=True, compact_prompts=False,
+                     chunked=False, store=None, kind=None):
+    stage = "extract"
+    try:
+        parsed = None
+        if store is not None:
+            with timed_stage("lookup"):
+                doc_hash = content_hash(source)
+                parse_version, enrich_version = document_versions(build_prompt, build_enrichment_prompt, compact_prompts)
+                enriched = store.get_enriched(doc_hash, parse_version, enrich_version)
+                if enriched is None:
+                    parsed = store.get_parsed(doc_hash, parse_version)
+                record_cache_status(enriched is not None or parsed is not None)
+            if enriched is not None:
+                return enriched
+        # A stored parse means only the enrichment prompt changed, so only enrichment re-runs
+        if parsed is None:
+            with timed_stage(stage):
+                pages = store.get_pages(doc_hash) if store is not None else None
+                if pages is None:
+                    pages = extract_page_texts(source)
+                    if store is not None:
+                        store.save_pages(doc_hash, kind, pages)
+            stage = "parse"
+            with timed_stage(stage):
+                if chunked:
+                    parsed = parse_document_chunked(pages, build_prompt, api_key, use_cache, kind=kind)
+                else:
+                    parsed = call_openai_json("parse", build_prompt("\n".join(pages)), api_key, use_cache, PARSE_TEMPLATES.get(kind))
+            if store is not None:
+                store.save_parsed(doc_hash, parse_version, kind, parsed)
+        stage = "enrich"
+        with timed_stage(stage):
+            budget = PROMPT_BUDGETS["enrich"] if compact_prompts else None
+            answer = call_openai_for_enrichment(build_enrichment_prompt(parsed, budget), api_key, use_cache, kind)
+            enriched = merge_enrichment(parsed, answer)
+        if store is not None:
+            store.save_enriched(doc_hash, parse_version, enrich_version, enriched)
+        return enriched
+    except Exception as e:
+        raise StageError(stage, e) from e
+
+def reenrich_stored_profiles(store, build_prompt, build_enrichment_prompt, kind, api_key, use_cache=True,
+                             compact_prompts=False, workers=4):
+    # Enrich stored parses that have no result for the current enrichment prompt; returns (done, failed)
+    parse_version, enrich_version = document_versions(build_prompt, build_enrichment_prompt, compact_prompts)
+    stale = store.stale_enrichments(kind, parse_version, enrich_version)
+    budget = PROMPT_BUDGETS["enrich"] if compact_prompts else None
+
+    def enrich(doc_hash, parsed):
+        with timed_stage("enrich"):
+            answer = call_openai_for_enrichment(build_enrichment_prompt(parsed, budget), api_key, use_cache, kind)
+        store.save_enriched(doc_hash, parse_version, enrich_version, merge_enrichment(parsed, answer))
+
+    done, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, enrich, doc_hash, parsed) for doc_hash, parsed in stale]
+        for future in futures:
+            try:
+                future.result()
+                done += 1
+            except Exception:
+                failed += 1
+    return done, failed
+
+# Map-reduce parsing: chunks on page/section boundaries are parsed in parallel
+# and merged, so latency follows the largest chunk rather than the document
+CHUNK_WORKERS = 4
+
+def parse_document_chunked(pages, build_prompt, api_key, use_cache=True, max_chunk_tokens=CHUNK_TOKENS, kind=None):
+    chunks = split_into_chunks(pages, max_chunk_tokens)
+    if len(chunks) <= 1:
+        return call_openai_json("parse", build_prompt("\n".join(pages)), api_key, use_cache, PARSE_TEMPLATES.get(kind))
+
+    def parse_chunk(index, chunk):
+        note = (
+            f"The text below is part {index + 1} of {len(chunks)} of a longer document. "
+            "Only fill in the fields supported by this part and leave the others empty.\n"
+        )
+        # A chunk such as a references page can rightly have nothing to extract,
+        # so only the merged result is checked for content
+        return call_openai_json("parse", note + build_prompt(chunk), api_key, use_cache, PARSE_TEMPLATES.get(kind),
+                                check_content=False)
+
+    with ThreadPoolExecutor(max_workers=min(len(chunks), CHUNK_WORKERS)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, parse_chunk, index, chunk)
+            for index, chunk in enumerate(chunks)
+        ]
+        partials = [future.result() for future in futures]
+    merged = merge_partials(partials)
+    if not STAGE_CHECKS["parse"](merged):
+        # Nothing found in any chunk: parse the whole document in one call instead
+        return call_openai_json("parse", build_prompt("\n".join(pages)), api_key, use_cache, PARSE_TEMPLATES.get(kind))
+    return merged
+
+def process_document_single_pass(source, build_single_pass_prompt, schema_name, template, api_key, use_cache=True,
+                                 store=None, kind=None):
+    stage = "extract"
+    try:
+        if store is not None:
+            with timed_stage("lookup"):
+                doc_hash = content_hash(source)
+                parse_version = prompt_version(build_single_pass_prompt(""), *stage_models("single_pass"))
+                enriched = store.get_enriched(doc_hash, parse_version, "single-pass")
+                record_cache_status(enriched is not None)
+            if enriched is not None:
+                return enriched
+        with timed_stage(stage):
+            text = extract_text_from_pdf(source)
+        stage = "parse"
+        with timed_stage(stage):
+            enriched = call_openai_structured(build_single_pass_prompt(text), api_key, schema_name, template, use_cache)
+        if store is not None:
+            # Also stored as the parse so the profile can be found by name and email
+            store.save_parsed(doc_hash, parse_version, kind, enriched)
+            store.save_enriched(doc_hash, parse_version, "single-pass", enriched)
+        return enriched
+    except Exception as e:
+        raise StageError(stage, e) from e
+
+# Prompt builders and schema for each kind of document
+DOCUMENT_PROMPTS = {
+    "cv": (buildCV_prompt, buildCV_enrichment_prompt, buildCV_single_pass_prompt, CV_JSON_SCHEMA),
+    "jd": (buildJD_prompt, buildJD_enrichment_prompt, buildJD_single_pass_prompt, JD_JSON_SCHEMA),
+}
+
+def enrich_document(source, kind, api_key, use_cache=True, single_pass=False, compact_prompts=True, chunked=True, store=None):
+    build_prompt, build_enrichment_prompt, build_single_pass_prompt, template = DOCUMENT_PROMPTS[kind]
+    if single_pass:
+        return process_document_single_pass(source, build_single_pass_prompt, f"enriched_{kind}", template, api_key, use_cache, store, kind)
+    return process_document(source, build_prompt, build_enrichment_prompt, api_key, use_cache, compact_prompts, chunked, store, kind)
+
+def run_branches(branches):
+    # Run independent callables in parallel and collect every outcome,
+    # so one failing branch does not hide the other's result
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(len(branches), 1)) as executor:
+        # Each branch gets its own copy of the context so stage metrics reach the current run
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, scoped(name, branch))
+            for name, branch in branches.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+    return results, errors
 
 # Helper function to extract missing points from flagging response
 def extract_missing_points(response):
@@ -267,6 +419,144 @@ def extract_missing_points(response):
     
     return missing_points[:5]  # Limit to 5 points
 
+# STEP 6: Run the whole pipeline as a background job
+def collect_stream(job, key, chunks):
+    # Publish partial text on the job as it streams so the UI can show it while polling
+    parts = []
+    for chunk in chunks:
+        job.check_cancelled()
+        parts.append(chunk)
+        job.set_output(key, "".join(parts))
+    return "".join(parts)
+
+def analyze_match(job, enriched_cv, enriched_jd, api_key, use_cache=True, compact_prompts=True, structured_analysis=False,
+                  questionnaire=True):
+    # Flagging, missing points and questionnaire, each published on the job as it is ready;
+    # returns (flagging_response, missing_points, questionnaire_response)
+    flagging_budget = PROMPT_BUDGETS["flagging"] if compact_prompts else None
+    stage = "analysis" if structured_analysis else "flagging"
+    try:
+        if structured_analysis:
+            # One round trip instead of three, and no scraping of free text
+            with timed_stage(stage):
+                analysis = call_openai_structured(buildAnalysis_prompt(enriched_cv, enriched_jd, flagging_budget), api_key, "cv_analysis", ANALYSIS_JSON_SCHEMA, use_cache, "analysis")
+                flagging_response, questionnaire_response = format_analysis(analysis)
+                missing_points = [item.get("point", "") for item in analysis.get("missing_information", [])][:5]
+            job.set_output("analysis", analysis)
+            job.set_output("flagging_response", flagging_response)
+            job.set_output("missing_points", missing_points)
+            job.set_output("questionnaire_response", questionnaire_response)
+            return flagging_response, missing_points, questionnaire_response
+
+        with timed_stage(stage):
+            flagging_prompt = buildFlagging_prompt(enriched_cv, enriched_jd, flagging_budget)
+            flagging_response = collect_stream(job, "flagging_response", stream_openai(flagging_prompt, api_key, use_cache, "flagging"))
+        
+        stage = "missing_points"
+        with timed_stage(stage):
+            missing_points = extract_missing_points(flagging_response)
+        job.set_output("missing_points", missing_points)
+        
+        questionnaire_response = None
+        if questionnaire:
+            stage = "questionnaire"
+            with timed_stage(stage):
+                questionnaire_prompt = buildQuestionnaire_prompt(missing_points)
+                questionnaire_response = collect_stream(job, "questionnaire_response", stream_openai(questionnaire_prompt, api_key, use_cache, "questionnaire"))
+        return flagging_response, missing_points, questionnaire_response
+    except Exception as e:
+        raise StageError(stage, e) from e
+
+def run_pipeline(job, cv_source, jd_source, api_key, use_cache=True, single_pass=False, compact_prompts=True, chunked=True,
+                 store=None, structured_analysis=False, source="streamlit"):
+    # Results are published on job.outputs as each stage finishes; sources are PDF bytes or paths
+    branches = {
+        "CV": lambda: enrich_document(cv_source, "cv", api_key, use_cache, single_pass, compact_prompts, chunked, store),
+        "JD": lambda: enrich_document(jd_source, "jd", api_key, use_cache, single_pass, compact_prompts, chunked, store),
+    }
+    run = None
+    try:
+        with track_run(source=source, job=job.id) as run:
+            results, errors = run_branches(branches)
+            for name, result in results.items():
+                job.set_output(f"enriched_{name.lower()}", result)
+            if errors:
+                raise RuntimeError("; ".join(f"{name} processing failed: {error}" for name, error in errors.items()))
+            
+            flagging_response, missing_points, questionnaire_response = analyze_match(
+                job, results["CV"], results["JD"], api_key, use_cache, compact_prompts, structured_analysis
+            )
+            if store is not None:
+                store.save_run(run.run_id, content_hash(cv_source), content_hash(jd_source),
+                               flagging_response, missing_points, questionnaire_response)
+    finally:
+        if run is not None:
+            job.set_output("run_metrics", run.to_dict())
+
+# Copy a finished job's outputs into the session for the Results and Download tabs
+def load_job_results(job_id, outputs):
+    st.session_state.enriched_cv = outputs.get("enriched_cv")
+    st.session_state.enriched_jd = outputs.get("enriched_jd")
+    st.session_state.flagging_response = outputs.get("flagging_response")
+    st.session_state.questionnaire_response = outputs.get("questionnaire_response")
+    st.session_state.analysis = outputs.get("analysis")
+    # Files are only rendered when a download is requested
+    st.session_state.artifacts = run_artifacts(job_id, outputs)
+    st.session_state.run_metrics = outputs.get("run_metrics")
+
+JOB_POLL_SECONDS = 1.0
+JOB_STATUS_LABELS = {
+    "queued": "Queued",
+    "running": "Running",
+    "done": "Complete",
+    "error": "Failed",
+    "cancelled": "Cancelled",
+}
+STAGE_ICONS = {"running": "⏳", "ok": "✅", "error": "❌"}
+
+# Job panel, run as a fragment that polls while any job is still going
+def render_jobs(runner):
+    reload_app = False
+    for job_id in reversed(st.session_state.job_ids):
+        job = runner.get(job_id)
+        if job is None:
+            continue  # Dropped from the history or lost with a server restart
+        snapshot = job.snapshot()
+        outputs = snapshot["outputs"]
+        label = "Cancelling..." if snapshot["cancelling"] else JOB_STATUS_LABELS[snapshot["status"]]
+        with st.container(border=True):
+            st.markdown(f"**{snapshot['name']}** · {label}")
+            if snapshot["stages"]:
+                st.caption(" · ".join(f"{STAGE_ICONS.get(status, '')} {stage}" for stage, status in snapshot["stages"].items()))
+            
+            if not job.done:
+                # Partial output while flagging and questionnaire stream in
+                if outputs.get("questionnaire_response"):
+                    st.markdown(outputs["questionnaire_response"])
+                elif outputs.get("flagging_response"):
+                    st.markdown(outputs["flagging_response"])
+                if st.button("Cancel", key=f"cancel_{job_id}", disabled=snapshot["cancelling"]):
+                    runner.cancel(job_id)
+            elif snapshot["status"] == "error":
+                st.error(f"An error occurred: {snapshot['error']}")
+                for key, title in (("enriched_cv", "Enriched CV"), ("enriched_jd", "Enriched JD")):
+                    if outputs.get(key):
+                        with st.expander(f"Show {title} JSON"):
+                            st.json(outputs[key])
+            elif snapshot["status"] == "done":
+                # The newest run is collected automatically once it finishes
+                if job_id not in st.session_state.collected_jobs and job_id == st.session_state.job_ids[-1]:
+                    load_job_results(job_id, outputs)
+                    reload_app = True
+                st.success("Processing complete! The full output is in the Results tab.")
+                if st.button("Show these results", key=f"load_{job_id}"):
+                    load_job_results(job_id, outputs)
+                    reload_app = True
+            if job.done:
+                st.session_state.collected_jobs.add(job_id)
+    if reload_app:
+        st.rerun()
+
 # Main Streamlit application
 def main():
     st.set_page_config(page_title="CV-JD Matching Application", layout="wide")
@@ -295,13 +585,67 @@ def main():
         st.warning("Please enter your OpenAI API Key to use this application.")
         st.stop()
     
+    with st.sidebar:
+        st.subheader("Pipeline")
+        single_pass = st.checkbox(
+            "Single-pass parse + enrich",
+            value=False,
+            help=f"Parse and enrich each document in one schema-constrained call ({' → '.join(stage_models('single_pass'))}) instead of separate parse and enrichment calls."
+        )
+        chunked = st.checkbox(
+            "Chunked parsing for long documents",
+            value=True,
+            help="Split long CVs and job descriptions on page and section boundaries and parse the parts in parallel. Not used in single-pass mode."
+        )
+        structured_analysis = st.checkbox(
+            "One-call structured analysis",
+            value=False,
+            help=f"Get the overview, missing information and interview questions in one schema-constrained call ({' → '.join(stage_models('analysis'))}) instead of separate flagging and questionnaire calls."
+        )
+        compact_prompts = st.checkbox(
+            "Compact prompts",
+            value=True,
+            help="Send documents to the enrichment and flagging prompts without indentation or empty fields, trimmed to a token budget."
+        )
+        
+        # Stored profiles and past runs
+        st.subheader("Profile Store")
+        use_store = st.checkbox(
+            "Reuse stored profiles",
+            value=True,
+            help="Documents seen before are not parsed again; only enrichment re-runs when its prompt changes."
+        )
+        store = get_profile_store()
+        lookup = st.text_input("Find past runs by candidate name or email")
+        if lookup:
+            past_runs = store.runs_for_candidate(email=lookup) if "@" in lookup else store.runs_for_candidate(name=lookup)
+            if past_runs:
+                for past_run in past_runs:
+                    with st.expander(f"JD {past_run['jd_hash'][:12]} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(past_run['created']))}"):
+                        st.markdown(past_run["flagging_response"] or "")
+            else:
+                st.caption("No past runs found.")
+        
+        # Response cache controls
+        st.subheader("Response Cache")
+        use_cache = st.checkbox(
+            "Reuse cached OpenAI responses",
+            value=True,
+            help="Identical prompts are answered from the local cache instead of calling the API again."
+        )
+        cache = get_response_cache()
+        if st.button("Clear cache"):
+            cache.purge()
+            st.success("Response cache cleared.")
+        stats = cache.stats()
+        st.caption(
+            f"{stats['entries']} entries ({stats['bytes'] / 1024:.0f} KB) · "
+            f"{stats['hits']} hits · {stats['misses']} misses"
+        )
+    
     # Create tabs for the different sections
     tab1, tab2, tab3 = st.tabs(["Upload Files", "Results", "Download"])
     
-    # Ensure necessary directories exist
-    for directory in ["temp", "outputs"]:
-        os.makedirs(directory, exist_ok=True)
-    
     # State management
     if 'enriched_cv' not in st.session_state:
         st.session_state.enriched_cv = None
@@ -311,6 +655,17 @@ def main():
         st.session_state.flagging_response = None
     if 'questionnaire_response' not in st.session_state:
         st.session_state.questionnaire_response = None
+    if 'analysis' not in st.session_state:
+        st.session_state.analysis = None
+    if 'artifacts' not in st.session_state:
+        st.session_state.artifacts = None
+    if 'run_metrics' not in st.session_state:
+        st.session_state.run_metrics = None
+    if 'job_ids' not in st.session_state:
+        st.session_state.job_ids = [job_id for job_id in st.query_params.get("jobs", "").split(",") if job_id]
+    if 'collected_jobs' not in st.session_state:
+        st.session_state.collected_jobs = set()
+    runner = get_job_runner()
     
     # Tab 1: Upload Files
     with tab1:
@@ -326,95 +681,31 @@ def main():
         
         if cv_file and jd_file:
             if st.button("Process Files"):
-                with st.spinner("Processing files... This may take a moment."):
-                    try:
-                        # Save uploaded files temporarily
-                        cv_path = os.path.join("temp", cv_file.name)
-                        jd_path = os.path.join("temp", jd_file.name)
-                        
-                        with open(cv_path, "wb") as f:
-                            f.write(cv_file.read())
-                        with open(jd_path, "wb") as f:
-                            f.write(jd_file.read())
-                        
-                        # Extract text from PDFs
-                        cv_text = extract_text_from_pdf(cv_path)
-                        jd_text = extract_text_from_pdf(jd_path)
-                        
-                        # Parse CVs and JDs
-                        cv_prompt = buildCV_prompt(cv_text)
-                        jd_prompt = buildJD_prompt(jd_text)
-                        
-                        parsed_cv = json.loads(call_openai(cv_prompt, api_key))
-                        parsed_jd = json.loads(call_openai(jd_prompt, api_key))
-                        
-                        # Enrich parsed data
-                        cv_enrichment_prompt = buildCV_enrichment_prompt(parsed_cv)
-                        jd_enrichment_prompt = buildJD_enrichment_prompt(parsed_jd)
-                        
-                        enriched_cv = call_openai_for_enrichment(cv_enrichment_prompt, api_key)
-                        enriched_jd = call_openai_for_enrichment(jd_enrichment_prompt, api_key)
-                        
-                        # Store in session state
-                        st.session_state.enriched_cv = enriched_cv
-                        st.session_state.enriched_jd = enriched_jd
-                        
-                        # Generate flagging and questionnaire
-                        flagging_prompt = f"""
-                        Candidate CV:
-                        {json.dumps(enriched_cv, indent=2)}
-
-                        Job Description:
-                        {json.dumps(enriched_jd, indent=2)}
-
-                        Please answer the following questions:
-                        1. Could you please give me an overview of this candidate's CV?
-                        2. Could you expand on the missing information that you pointed out? Please explain why they should be important.
-                        3. This candidate is applying for the role described in the Job Description. Given the role, what key information is missing from the CV? Sum it up in 5 points.
-                        """
-                        
-                        flagging_response = call_openai(flagging_prompt, api_key)
-                        st.session_state.flagging_response = flagging_response
-                        
-                        missing_points = extract_missing_points(flagging_response)
-                        
-                        questionnaire_prompt = f"""
-                        Based on the missing points identified earlier, please draw up a 5-question questionnaire to be asked during an interview with the candidate. 
-                        These questions should be formulated in a way that can give the candidate the possibility to explain why that information is missing. 
-                        One question for each of the points mentioned below:
-
-                        {json.dumps(missing_points, indent=2)}
-                        """
-                        
-                        questionnaire_response = call_openai(questionnaire_prompt, api_key)
-                        st.session_state.questionnaire_response = questionnaire_response
-                        
-                        # Save outputs as PDFs
-                        flagging_pdf_path = os.path.join("outputs", "flagging_output.pdf")
-                        pdf = FPDF()
-                        pdf.add_page()
-                        pdf.set_font("Arial", size=12)
-                        pdf.multi_cell(0, 10, flagging_response)
-                        pdf.output(flagging_pdf_path)
-                        
-                        questionnaire_pdf_path = os.path.join("outputs", "questionnaire.pdf")
-                        pdf = FPDF()
-                        pdf.add_page()
-                        pdf.set_font("Arial", size=12)
-                        pdf.multi_cell(0, 10, questionnaire_response)
-                        pdf.output(questionnaire_pdf_path)
-                        
-                        # Save JSON files
-                        with open(os.path.join("outputs", "enriched_cv.json"), "w") as f:
-                            json.dump(enriched_cv, f, indent=4)
-                        
-                        with open(os.path.join("outputs", "enriched_jd.json"), "w") as f:
-                            json.dump(enriched_jd, f, indent=4)
-                        
-                        st.success("Processing complete! Go to the Results tab to view the output.")
-                    
-                    except Exception as e:
-                        st.error(f"An error occurred: {str(e)}")
+                # The run goes on in a background job, so reruns and other sessions are not blocked
+                job_id = runner.submit(
+                    f"{cv_file.name} / {jd_file.name}",
+                    run_pipeline,
+                    cv_file.getvalue(),
+                    jd_file.getvalue(),
+                    api_key,
+                    use_cache,
+                    single_pass,
+                    compact_prompts,
+                    chunked,
+                    store if use_store else None,
+                    structured_analysis,
+                )
+                st.session_state.job_ids.append(job_id)
+                # Keep job IDs in the URL so a browser refresh can still collect the results
+                st.query_params["jobs"] = ",".join(st.session_state.job_ids)
+        
+        if st.session_state.job_ids:
+            st.subheader("Runs")
+            active = any(
+                runner.get(job_id) is not None and not runner.get(job_id).done
+                for job_id in st.session_state.job_ids
+            )
+            st.fragment(render_jobs, run_every=JOB_POLL_SECONDS if active else None)(runner)
     
     # Tab 2: Results
     with tab2:
@@ -431,54 +722,104 @@ def main():
             with jd_expander:
                 st.json(st.session_state.enriched_jd)
             
-            st.subheader("CV Analysis and Missing Information")
-            st.markdown(st.session_state.flagging_response)
+            if st.session_state.analysis:
+                analysis = st.session_state.analysis
+                st.subheader("CV Analysis and Missing Information")
+                st.markdown(analysis["overview"])
+                st.markdown("**Key Missing Information**")
+                for item in analysis["missing_information"]:
+                    st.markdown(f"- **{item['point']}**: {item['why_it_matters']}")
+                
+                st.subheader("Interview Questions")
+                for number, item in enumerate(analysis["interview_questions"], start=1):
+                    st.markdown(f"{number}. {item['question']}")
+                    st.caption(f"Missing point: {item['missing_point']}")
+            else:
+                if st.session_state.flagging_response:
+                    st.subheader("CV Analysis and Missing Information")
+                    st.markdown(st.session_state.flagging_response)
+                
+                if st.session_state.questionnaire_response:
+                    st.subheader("Interview Questions")
+                    st.markdown(st.session_state.questionnaire_response)
             
-            st.subheader("Interview Questions")
-            st.markdown(st.session_state.questionnaire_response)
+            if st.session_state.run_metrics:
+                totals = st.session_state.run_metrics["totals"]
+                with st.expander("Run metrics"):
+                    st.caption(
+                        f"{totals['seconds']:.1f}s · {totals['llm_calls']} LLM calls · {totals['cache_hits']} cache hits · "
+                        f"{totals['prompt_tokens']} prompt + {totals['completion_tokens']} completion tokens · "
+                        f"~${totals['cost']:.4f} · {totals['tokens_saved']} prompt tokens saved by compaction · "
+                        f"{totals['escalations']} of {totals['cascades']} model cascades escalated"
+                    )
+                    st.dataframe(st.session_state.run_metrics["stages"], use_container_width=True)
+                    for record in st.session_state.run_metrics["stages"]:
+                        page_seconds = record.get("page_seconds")
+                        if page_seconds:
+                            slowest = max(range(len(page_seconds)), key=page_seconds.__getitem__)
+                            st.caption(
+                                f"{record['stage']}: {len(page_seconds)} pages in {sum(page_seconds):.2f}s, "
+                                f"slowest page {slowest + 1} at {page_seconds[slowest]:.2f}s"
+                            )
         else:
             st.info("Please upload and process files first.")
     
     # Tab 3: Download
     with tab3:
-        if st.session_state.enriched_cv and st.session_state.enriched_jd:
+        if st.session_state.artifacts:
             st.header("Download Results")
+            artifacts = st.session_state.artifacts
             
             col1, col2 = st.columns(2)
             
             with col1:
-                with open(os.path.join("outputs", "flagging_output.pdf"), "rb") as file:
-                    st.download_button(
-                        label="Download CV Analysis",
-                        data=file,
-                        file_name="cv_analysis.pdf",
-                        mime="application/pdf"
-                    )
+                st.download_button(
+                    label="Download CV Analysis",
+                    data=artifacts["flagging_output.pdf"],
+                    file_name="cv_analysis.pdf",
+                    mime="application/pdf"
+                )
                 
-                with open(os.path.join("outputs", "enriched_cv.json"), "rb") as file:
-                    st.download_button(
-                        label="Download Enriched CV (JSON)",
-                        data=file,
-                        file_name="enriched_cv.json",
-                        mime="application/json"
-                    )
+                st.download_button(
+                    label="Download Enriched CV (JSON)",
+                    data=artifacts["enriched_cv.json"],
+                    file_name="enriched_cv.json",
+                    mime="application/json"
+                )
             
             with col2:
-                with open(os.path.join("outputs", "questionnaire.pdf"), "rb") as file:
-                    st.download_button(
-                        label="Download Interview Questions",
-                        data=file,
-                        file_name="interview_questions.pdf",
-                        mime="application/pdf"
-                    )
+                st.download_button(
+                    label="Download Interview Questions",
+                    data=artifacts["questionnaire.pdf"],
+                    file_name="interview_questions.pdf",
+                    mime="application/pdf"
+                )
                 
-                with open(os.path.join("outputs", "enriched_jd.json"), "rb") as file:
-                    st.download_button(
-                        label="Download Enriched JD (JSON)",
-                        data=file,
-                        file_name="enriched_jd.json",
-                        mime="application/json"
-                    )
+                st.download_button(
+                    label="Download Enriched JD (JSON)",
+                    data=artifacts["enriched_jd.json"],
+                    file_name="enriched_jd.json",
+                    mime="application/json"
+                )
+            
+            # One PDF covering every finished run in this session
+            finished = [
+                (job_id, runner.get(job_id).snapshot())
+                for job_id in st.session_state.job_ids
+                if runner.get(job_id) is not None and runner.get(job_id).status == "done"
+            ]
+            if len(finished) > 1:
+                sections = [
+                    candidate_section(snapshot["name"], snapshot["outputs"].get("flagging_response"), snapshot["outputs"].get("questionnaire_response"))
+                    for _, snapshot in finished
+                ]
+                st.download_button(
+                    label=f"Download Combined Report ({len(finished)} runs)",
+                    data=lambda: memoized(",".join(job_id for job_id, _ in finished), "combined.pdf",
+                                          lambda: render_combined_report("CV-JD Matching Report", sections)),
+                    file_name="combined_report.pdf",
+                    mime="application/pdf"
+                )
         else:
             st.info("Please upload and process files first.")
 
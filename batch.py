@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from app import (
+    StageError,
+    analyze_match,
+    enrich_document,
+    reenrich_stored_profiles,
+    buildCV_prompt,
+    buildJD_prompt,
+    buildCV_enrichment_prompt,
+    buildJD_enrichment_prompt,
+    extract_text_from_pdf,
+)
+from jobs import InlineJob
+from metrics import track_run
+from prescreen import PrescreenIndex
+from profile_store import get_profile_store
+from reports import candidate_section, render_combined_report
+
+# Headless batch mode: score many CVs against one JD and stream results as JSONL
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def collect_cv_paths(inputs, jd_path=None):
+    cv_paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            cv_paths.extend(sorted(glob.glob(os.path.join(item, "*.pdf"))))
+        else:
+            cv_paths.append(item)
+    # The JD often sits in the same directory as the CVs
+    if jd_path is not None:
+        jd_real_path = os.path.realpath(jd_path)
+        cv_paths = [cv_path for cv_path in cv_paths if os.path.realpath(cv_path) != jd_real_path]
+    return cv_paths
+
+
+def load_completed(output_path):
+    # Only successful candidates count as done, so failed ones are retried on resume
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A crash mid-write can leave a truncated last line
+            if record.get("status") == "ok":
+                completed.add(record["cv_sha256"])
+    return completed
+
+
+def prescreen_candidates(jd_path, cv_files, shortlist=None, min_score=None, index_path=None):
+    # Rank CVs locally with BM25 and return {cv_sha256: (rank, score)} for those that pass
+    if index_path and os.path.exists(index_path):
+        index = PrescreenIndex.load(index_path)
+    else:
+        index = PrescreenIndex()
+    index.add_documents((cv_sha256, extract_text_from_pdf(cv_path)) for cv_path, cv_sha256 in cv_files if cv_sha256 not in index)
+    if index_path:
+        index.save(index_path)
+    ranked = index.rank(
+        extract_text_from_pdf(jd_path),
+        top_n=shortlist,
+        min_score=min_score,
+        doc_ids=[cv_sha256 for _, cv_sha256 in cv_files],
+    )
+    return {cv_sha256: (rank, score) for rank, (cv_sha256, score) in enumerate(ranked, start=1)}
+
+
+def score_candidate(cv_path, cv_sha256, enriched_jd, api_key, use_cache=True, questionnaire=False, single_pass=False,
+                    compact_prompts=True, chunked=True, store=None, jd_sha256=None, structured_analysis=False):
+    record = {"cv": cv_path, "cv_sha256": cv_sha256}
+    job = InlineJob(cv_path)
+    with track_run(source="batch", cv=cv_path) as run:
+        try:
+            enriched_cv = enrich_document(cv_path, "cv", api_key, use_cache, single_pass, compact_prompts, chunked, store)
+            job.set_output("enriched_cv", enriched_cv)
+            # The questionnaire comes with a structured analysis, so it is then always included
+            flagging_response, missing_points, questionnaire_response = analyze_match(
+                job, enriched_cv, enriched_jd, api_key, use_cache, compact_prompts, structured_analysis, questionnaire
+            )
+            if store is not None:
+                store.save_run(run.run_id, cv_sha256, jd_sha256, flagging_response, missing_points, questionnaire_response)
+            record.update(status="ok", **job.outputs)
+        except StageError as e:
+            run.status = "error"
+            record.update(status="error", stage=e.stage, error=str(e.error))
+        except Exception as e:
+            # Anything else, e.g. a store error, fails only this candidate
+            run.status = "error"
+            record.update(status="error", stage="unknown", error=str(e))
+    record["metrics"] = run.totals()
+    return record
+
+
+def run_batch(jd_path, cv_paths, api_key, output_path, workers=8, use_cache=True, questionnaire=False, resume=True,
+              shortlist=None, min_score=None, index_path=None, single_pass=False, compact_prompts=True, chunked=True,
+              store=None, structured_analysis=False):
+    jd_sha256 = file_sha256(jd_path)
+    cv_files = [(cv_path, file_sha256(cv_path)) for cv_path in cv_paths]
+
+    # Rank every CV, including finished ones, so the shortlist is stable across resumes
+    prescreen = None
+    if shortlist is not None or min_score is not None or index_path:
+        prescreen = prescreen_candidates(jd_path, cv_files, shortlist, min_score, index_path)
+
+    # The JD is parsed and enriched once and shared by every candidate
+    with track_run(source="batch", jd=jd_path):
+        enriched_jd = enrich_document(jd_path, "jd", api_key, use_cache, single_pass, compact_prompts, chunked, store)
+
+    completed = load_completed(output_path) if resume else set()
+    pending = []
+    for cv_path, cv_sha256 in cv_files:
+        if prescreen is not None and cv_sha256 not in prescreen:
+            continue
+        if cv_sha256 not in completed:
+            completed.add(cv_sha256)  # Also skips duplicate files within this run
+            pending.append((cv_path, cv_sha256))
+
+    write_lock = threading.Lock()
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(score_candidate, cv_path, cv_sha256, enriched_jd, api_key, use_cache, questionnaire, single_pass,
+                            compact_prompts, chunked, store, jd_sha256, structured_analysis)
+            for cv_path, cv_sha256 in pending
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            if prescreen is not None:
+                record["prescreen_rank"], record["prescreen_score"] = prescreen[record["cv_sha256"]]
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            yield record
+
+
+def write_batch_report(output_path, report_path, jd_path):
+    # One PDF for every successful candidate in the output, best prescreen rank first
+    records = {}
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                records[record["cv_sha256"]] = record
+    ordered = sorted(records.values(), key=lambda record: (record.get("prescreen_rank") or float("inf"), record["cv"]))
+    sections = [
+        candidate_section(
+            f"{os.path.basename(record['cv'])} (rank {record['prescreen_rank']})" if record.get("prescreen_rank") else os.path.basename(record["cv"]),
+            record["flagging_response"],
+            record.get("questionnaire_response"),
+        )
+        for record in ordered
+    ]
+    with open(report_path, "wb") as f:
+        f.write(render_combined_report(f"Candidates for {os.path.basename(jd_path)}", sections))
+    return len(sections)
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Score a batch of CVs against one job description.")
+    parser.add_argument("--jd", help="Job description PDF")
+    parser.add_argument("--cvs", nargs="+", help="CV PDFs or directories containing them")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum number of candidates processed at once")
+    parser.add_argument("--api-key", default=os.getenv("OPENAI_API_KEY"), help="OpenAI API key (defaults to $OPENAI_API_KEY)")
+    parser.add_argument("--questionnaire", action="store_true", help="Also generate interview questions per candidate")
+    parser.add_argument("--shortlist", type=int, help="Only send the top N CVs by local BM25 score to the LLM")
+    parser.add_argument("--min-score", type=float, help="Only send CVs whose local BM25 score is at least this")
+    parser.add_argument("--index", help="Prescreen index file, loaded if present and updated with new CVs")
+    parser.add_argument("--single-pass", action="store_true", help="Parse and enrich each document in one structured-output call")
+    parser.add_argument("--structured-analysis", action="store_true",
+                        help="Get the analysis, missing points and interview questions in one structured-output call")
+    parser.add_argument("--no-compact-prompts", action="store_true", help="Send pretty-printed, untrimmed documents to the prompts")
+    parser.add_argument("--no-chunking", action="store_true", help="Parse each document in a single call however long it is")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of skipping finished candidates")
+    parser.add_argument("--report", help="Also write one combined PDF report for all successful candidates here")
+    parser.add_argument("--no-store", action="store_true", help="Do not reuse or save profiles in the profile store")
+    parser.add_argument("--reenrich-stored", action="store_true",
+                        help="Only re-run enrichment for stored profiles whose enrichment prompt has changed, then exit")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an OpenAI API key is required (--api-key or $OPENAI_API_KEY)")
+    store = None if args.no_store else get_profile_store()
+
+    if args.reenrich_stored:
+        if store is None:
+            parser.error("--reenrich-stored needs the profile store")
+        failed = 0
+        for kind, build_prompt, build_enrichment_prompt in (
+            ("cv", buildCV_prompt, buildCV_enrichment_prompt),
+            ("jd", buildJD_prompt, buildJD_enrichment_prompt),
+        ):
+            with track_run(source="batch", reenrich=kind):
+                done, kind_failed = reenrich_stored_profiles(
+                    store, build_prompt, build_enrichment_prompt, kind, args.api_key,
+                    use_cache=not args.no_cache, compact_prompts=not args.no_compact_prompts, workers=args.workers,
+                )
+            failed += kind_failed
+            print(f"{kind}: {done} re-enriched, {kind_failed} failed", file=sys.stderr)
+        return 1 if failed else 0
+    if not args.jd or not args.cvs:
+        parser.error("--jd and --cvs are required")
+
+    cv_paths = collect_cv_paths(args.cvs, args.jd)
+    failed = 0
+    try:
+        for done, record in enumerate(run_batch(
+            args.jd,
+            cv_paths,
+            args.api_key,
+            args.output,
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            questionnaire=args.questionnaire,
+            resume=not args.no_resume,
+            shortlist=args.shortlist,
+            min_score=args.min_score,
+            index_path=args.index,
+            single_pass=args.single_pass,
+            compact_prompts=not args.no_compact_prompts,
+            chunked=not args.no_chunking,
+            store=store,
+            structured_analysis=args.structured_analysis,
+        ), start=1):
+            if record["status"] == "ok":
+                print(f"[{done}] {record['cv']}: ok", file=sys.stderr)
+            else:
+                failed += 1
+                print(f"[{done}] {record['cv']}: {record['stage']} failed: {record['error']}", file=sys.stderr)
+    except StageError as e:
+        print(f"Job description {e}", file=sys.stderr)
+        return 2
+    if args.report:
+        candidates = write_batch_report(args.output, args.report, args.jd)
+        print(f"Report with {candidates} candidates written to {args.report}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import json
+import time
+import random
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the chat completions API so the pipeline can be
+# benchmarked without spending credits. Latency, rate limits and response
+# shapes are configurable; responses are canned but schema-valid.
+
+CANNED_PROFILE = {
+    "name": "Alex Morgan",
+    "email": "alex.morgan@example.com",
+    "phone": "+44 20 7946 0000",
+    "country": "United Kingdom",
+    "city": "London",
+    "summary": "Sales leader with ten years of B2B SaaS experience.",
+    "skills": [
+        {"specialized skill": "Enterprise account management", "common skill": "Negotiation"},
+        {"specialized skill": "Salesforce CRM", "common skill": "Presentation"},
+    ],
+    "experience": [
+        {"job_title": "Regional Sales Manager", "company": "Northwind", "start_date": "2019", "end_date": "Present", "description": "Led a team of eight account executives."},
+        {"job_title": "Account Executive", "company": "Contoso", "start_date": "2015", "end_date": "2019", "description": "Closed mid-market deals across EMEA."},
+    ],
+    "education": [
+        {"degree": "BSc Business Management", "institution": "University of Leeds", "start_year": "2011", "end_year": "2014"},
+    ],
+    "enrichment parameters": [
+        {
+            "Employment Pattern & Progression": "Steady progression from individual contributor to manager.",
+            "Company Type & Sector": "Mid-size B2B SaaS.",
+            "Education Quality & Ranking": "Well ranked UK university.",
+            "Skill Demand & Market Relevance": "High demand.",
+            "Leadership Experience": "Managed a team of eight.",
+            "Budget & Project Management": "Owned a regional quota.",
+            "International Experience & Mobility": "EMEA coverage.",
+            "Soft Skills from Sales Calls": "Clear communicator.",
+            "Personality & Behavioral Traits": [
+                {"Openness": "High", "Conscientiousness": "High", "Extraversion": "High", "Agreeableness": "Moderate", "Neuroticism": "Low"}
+            ],
+            "Future Career Goals (Sales-Inferred)": "Head of Sales.",
+            "Salary Expectations (Sales-Inferred)": "GBP 90k-110k.",
+            "JD Enrichment with Implied Preferences": "",
+            "Cultural Fit Indicators": "Thrives in target-driven teams.",
+        }
+    ],
+}
+
+CANNED_FLAGGING = """1. Overview: The candidate is an experienced B2B sales leader with a consistent record of team leadership.
+
+2. The missing information matters because the role asks for evidence of quota attainment and pipeline management.
+
+Key Missing Information:
+- Quota attainment figures for the last three years
+- Size of deals closed
+- Experience with the CRM used by the hiring team
+- Reason for the gap between roles
+- Languages spoken for EMEA coverage
+"""
+
+CANNED_QUESTIONNAIRE = """1. Could you walk us through your quota attainment over the last three years?
+2. What was the typical size of the deals you closed?
+3. Which CRM tools have you used day to day?
+4. Could you tell us about the period between your last two roles?
+5. Which languages do you use with EMEA customers?
+"""
+
+
+def instance_from_schema(schema):
+    # Smallest document that satisfies a strict JSON Schema
+    if schema.get("type") == "object":
+        return {key: instance_from_schema(value) for key, value in schema.get("properties", {}).items()}
+    if schema.get("type") == "array":
+        return [instance_from_schema(schema["items"])]
+    return "lorem ipsum"
+
+
+def canned_response(body):
+    prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return json.dumps(instance_from_schema(response_format["json_schema"]["schema"]))
+    if response_format.get("type") == "json_object" or "JSON schema is as follows" in prompt or "respond ONLY with raw JSON" in prompt:
+        return json.dumps(CANNED_PROFILE)
+    if "questionnaire" in prompt:
+        return CANNED_QUESTIONNAIRE
+    return CANNED_FLAGGING
+
+
+class SlidingWindowLimiter:
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Returns 0 when the call is allowed, otherwise seconds until a slot frees up
+        if not self.per_minute:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            while self.calls and now - self.calls[0] > 60:
+                self.calls.popleft()
+            if len(self.calls) >= self.per_minute:
+                return 60 - (now - self.calls[0])
+            self.calls.append(now)
+            return 0.0
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        retry_after = server.limiter(body.get("model")).acquire()
+        if retry_after:
+            server.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{retry_after:.2f}"},
+            )
+            return
+        if server.error_rate and server.random() < server.error_rate:
+            server.count("errors")
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+        server.count("requests")
+
+        content = canned_response(body)
+        model = body.get("model", "gpt-4")
+        # Let cascades be exercised: small models sometimes return an empty JSON answer
+        if server.cheap_failure_rate and "mini" in model and content.startswith("{") and server.random() < server.cheap_failure_rate:
+            server.count("cheap_failures")
+            content = "{}"
+        prompt_tokens = sum(len(message.get("content", "")) for message in body.get("messages", [])) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        time.sleep(server.latency + server.random() * server.jitter)
+
+        if body.get("stream"):
+            self._stream(model, content, usage, completion_tokens, (body.get("stream_options") or {}).get("include_usage"))
+            return
+
+        time.sleep(completion_tokens * server.per_token_latency)
+        self._send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, model, content, usage, completion_tokens, include_usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(choices, **extra):
+            return json.dumps({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model, "choices": choices, **extra})
+
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        delay = completion_tokens * self.server.per_token_latency / max(len(pieces), 1)
+        for piece in pieces:
+            time.sleep(delay)
+            send(chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+        send(chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if include_usage:
+            send(chunk([], usage=usage))
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.0, per_token_latency=0.0, rpm=0, error_rate=0.0,
+                 cheap_failure_rate=0.0, seed=0):
+        super().__init__((host, port), FakeOpenAIHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.per_token_latency = per_token_latency
+        self.error_rate = error_rate
+        self.cheap_failure_rate = cheap_failure_rate
+        self.rpm = rpm
+        self.limiters = {}
+        self.counters = {"requests": 0, "rate_limited": 0, "errors": 0, "cheap_failures": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def limiter(self, model):
+        # Like the real API, each model has its own request limit
+        with self._lock:
+            if model not in self.limiters:
+                self.limiters[model] = SlidingWindowLimiter(self.rpm)
+            return self.limiters[model]
+
+    def random(self):
+        with self._lock:
+            return self._random.random()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def start_fake_server(**config):
+    server = FakeOpenAIServer(**config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat completions API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each response starts")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency of up to this many seconds")
+    parser.add_argument("--per-token-latency", type=float, default=0.0, help="Seconds per completion token")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute per model before returning 429 (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--cheap-failure-rate", type=float, default=0.0, help="Fraction of JSON answers from mini models left empty")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        per_token_latency=args.per_token_latency,
+        rpm=args.rpm,
+        error_rate=args.error_rate,
+        cheap_failure_rate=args.cheap_failure_rate,
+    )
+    print(f"Fake OpenAI API listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_openai_server import start_fake_server
+from benchmarks.synthetic_corpus import SIZES, generate_corpus
+
+# End-to-end benchmark of the app.py pipeline against the local fake API.
+# Run from the repository root: python -m benchmarks.run_benchmark
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile, stable for small samples
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def run_pair(app, cv_path, jd_path, single_pass=False, compact_prompts=True, chunked=True, structured_analysis=False):
+    # app.run_pipeline in the calling thread instead of a background job; returns the run metrics
+    from jobs import InlineJob
+
+    job = InlineJob(f"{cv_path} / {jd_path}")
+    app.run_pipeline(job, cv_path, jd_path, "sk-benchmark", False, single_pass, compact_prompts, chunked,
+                     structured_analysis=structured_analysis, source="benchmark")
+    return job.outputs["run_metrics"]
+
+
+def summarize(runs, elapsed, documents):
+    stages, cascades = {}, {}
+    for run in runs:
+        for record in run["stages"]:
+            stages.setdefault(record["stage"], []).append(record["seconds"])
+            counts = cascades.setdefault(record["stage"], [0, 0])
+            counts[0] += record["cascades"]
+            counts[1] += record["escalations"]
+    totals = [run["totals"]["seconds"] for run in runs]
+    return {
+        "runs": len(runs),
+        "documents": documents,
+        "elapsed_seconds": round(elapsed, 3),
+        "documents_per_minute": round(documents / elapsed * 60, 2) if elapsed else 0.0,
+        "run_p50": round(percentile(totals, 50), 4),
+        "run_p95": round(percentile(totals, 95), 4),
+        "stages": {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "escalation_rate": round(cascades[name][1] / cascades[name][0], 3) if cascades[name][0] else None,
+            }
+            for name, values in sorted(stages.items())
+        },
+    }
+
+
+def compare(report, baseline, tolerance):
+    # Returns human-readable regressions beyond the tolerance
+    regressions = []
+    for size, result in report["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if not base:
+            continue
+        if result["documents_per_minute"] < base["documents_per_minute"] * (1 - tolerance):
+            regressions.append(f"{size}: documents/minute {base['documents_per_minute']} -> {result['documents_per_minute']}")
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if base_stats and stats["p95"] > base_stats["p95"] * (1 + tolerance) + 0.005:
+                regressions.append(f"{size}: {stage} p95 {base_stats['p95']}s -> {stats['p95']}s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CV-JD pipeline against a local fake OpenAI API.")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--pairs", type=int, default=5, help="CV/JD pairs per size")
+    parser.add_argument("--concurrency", type=int, default=1, help="Pairs processed at once")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake API time to first token, in seconds")
+    parser.add_argument("--per-token-latency", type=float, default=0.0, help="Fake API seconds per completion token")
+    parser.add_argument("--rpm", type=int, default=0, help="Fake API requests per minute per model before 429s (0 = unlimited)")
+    parser.add_argument("--cheap-failure-rate", type=float, default=0.0, help="Fraction of JSON answers from mini models the fake API leaves empty")
+    parser.add_argument("--single-pass", action="store_true", help="Benchmark the single-pass parse + enrich mode")
+    parser.add_argument("--structured-analysis", action="store_true", help="Benchmark the one-call structured analysis mode")
+    parser.add_argument("--no-compact-prompts", action="store_true", help="Benchmark with pretty-printed, untrimmed prompts")
+    parser.add_argument("--no-chunking", action="store_true", help="Parse each document in a single call")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the PDF text cache between pairs")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the tracemalloc peak (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="cv_jd_bench_")
+    server = start_fake_server(latency=args.latency, per_token_latency=args.per_token_latency, rpm=args.rpm,
+                               cheap_failure_rate=args.cheap_failure_rate, seed=args.seed)
+    # Point every cache, metrics file and client at the sandbox before app is imported
+    os.environ["OPENAI_BASE_URL"] = server.url
+    os.environ["CV_JD_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["CV_JD_PDF_CACHE_DIR"] = os.path.join(workdir, "pdf_text")
+    os.environ["CV_JD_METRICS_PATH"] = os.path.join(workdir, "runs.jsonl")
+    # The client scheduler should know the fake server's limit, as it would the real one
+    os.environ["OPENAI_RPM_LIMIT"] = str(args.rpm) if args.rpm else os.getenv("OPENAI_RPM_LIMIT", "100000")
+    os.environ.setdefault("OPENAI_TPM_LIMIT", "100000000")
+    import app
+    import pdf_text
+
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        corpus = generate_corpus(os.path.join(workdir, "corpus"), args.sizes, args.pairs, args.seed)
+        report = {"config": vars(args), "sizes": {}}
+        for size in args.sizes:
+            pairs = [(cv_path, jd_path) for pair_size, cv_path, jd_path in corpus if pair_size == size]
+
+            def timed_pair(pair):
+                if not args.warm_cache:
+                    pdf_text.get_text_cache().purge()
+                return run_pair(app, pair[0], pair[1], args.single_pass, not args.no_compact_prompts, not args.no_chunking,
+                                args.structured_analysis)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                runs = list(executor.map(timed_pair, pairs))
+            elapsed = time.perf_counter() - started
+            report["sizes"][size] = summarize(runs, elapsed, documents=2 * len(pairs))
+
+        report["fake_server"] = dict(server.counters)
+        # ru_maxrss is reported in KiB on Linux
+        report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        if args.trace_memory:
+            report["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    finally:
+        if args.trace_memory:
+            tracemalloc.stop()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
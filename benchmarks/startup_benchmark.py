@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from benchmarks.run_benchmark import percentile
+
+# Cold start and Streamlit rerun timings for app.py.
+# Run from the repository root: python -m benchmarks.startup_benchmark
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import app; print(time.perf_counter() - started)"
+# Imported on first use by the pipeline rather than at startup
+DEFERRED_MODULES = ("openai", "pdfplumber", "fpdf", "tiktoken")
+
+
+def stats(values):
+    return {"p50": round(percentile(values, 50), 4), "p95": round(percentile(values, 95), 4)}
+
+
+def time_cold_imports(runs, env):
+    # Each import runs in a fresh interpreter so nothing is already loaded
+    import_seconds, process_seconds = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        process_seconds.append(time.perf_counter() - started)
+        import_seconds.append(float(output.strip().splitlines()[-1]))
+    return {"import": stats(import_seconds), "process": stats(process_seconds)}
+
+
+def loaded_at_startup(env):
+    snippet = f"import sys, app; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return [name for name in output.strip().split(",") if name]
+
+
+def time_reruns(runs):
+    # A full script rerun with an API key entered, as after any widget interaction
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=60)
+    app_test.run()
+    app_test.text_input[0].input("sk-benchmark").run()
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        app_test.run()
+        seconds.append(time.perf_counter() - started)
+    if app_test.exception:
+        raise RuntimeError(app_test.exception[0].message)
+    return stats(seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app.py cold start and Streamlit rerun overhead.")
+    parser.add_argument("--cold-runs", type=int, default=5, help="Fresh interpreters to time the app import in")
+    parser.add_argument("--reruns", type=int, default=20, help="Script reruns to time")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="cv_jd_startup_")
+    os.environ["CV_JD_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["CV_JD_PDF_CACHE_DIR"] = os.path.join(workdir, "pdf_text")
+    os.environ["CV_JD_METRICS_PATH"] = os.path.join(workdir, "runs.jsonl")
+    os.environ["CV_JD_STORE_PATH"] = os.path.join(workdir, "profiles.sqlite3")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+    try:
+        report = {
+            "config": vars(args),
+            "cold_start": time_cold_imports(args.cold_runs, env),
+            "loaded_at_startup": loaded_at_startup(env),
+            "rerun": time_reruns(args.reruns),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, current, base in (
+            ("cold import", report["cold_start"]["import"], baseline.get("cold_start", {}).get("import")),
+            ("rerun", report["rerun"], baseline.get("rerun")),
+        ):
+            if base and current["p50"] > base["p50"] * (1 + args.tolerance) + 0.005:
+                regressions.append(f"{name} p50 {base['p50']}s -> {current['p50']}s")
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import os
+import random
+
+from fpdf import FPDF
+
+# Seeded generator of synthetic multi-page CV and JD PDFs in several sizes
+SIZES = {"small": 1, "medium": 3, "large": 10}
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Robin", "Avery"]
+LAST_NAMES = ["Smith", "Garcia", "Nguyen", "Okafor", "Novak", "Rossi", "Kim", "Silva", "Dubois", "Khan"]
+COMPANIES = ["Northwind", "Contoso", "Fabrikam", "Globex", "Initech", "Umbrella", "Stark Industries", "Wayne Enterprises"]
+TITLES = ["Account Executive", "Sales Manager", "Data Analyst", "Software Engineer", "Product Manager", "Operations Lead"]
+SKILLS = [
+    "Python", "SQL", "Salesforce", "negotiation", "forecasting", "stakeholder management", "Excel", "Tableau",
+    "team leadership", "B2B sales", "project management", "customer success", "public speaking", "AWS",
+]
+INSTITUTIONS = ["University of Leeds", "TU Delft", "University of Toronto", "Sciences Po", "National University of Singapore"]
+SENTENCES = [
+    "Delivered year-over-year growth across a portfolio of enterprise accounts.",
+    "Partnered with marketing to build a predictable pipeline of qualified leads.",
+    "Coached junior colleagues and ran weekly forecast reviews.",
+    "Introduced a data-driven approach to territory planning.",
+    "Negotiated multi-year renewals with procurement teams.",
+    "Automated reporting that previously took a full day each week.",
+    "Represented the company at industry conferences and customer events.",
+]
+
+
+def _paragraph(rng, sentences=4):
+    return " ".join(rng.choice(SENTENCES) for _ in range(sentences))
+
+
+def _write_pdf(path, sections, pages):
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    for _ in range(pages):
+        pdf.add_page()
+        for heading, text in sections:
+            pdf.set_font("Arial", "B", 13)
+            pdf.cell(0, 9, heading, ln=1)
+            pdf.set_font("Arial", size=10)
+            pdf.multi_cell(0, 5, text)
+            pdf.ln(2)
+    pdf.output(path)
+
+
+def generate_cv(path, pages, rng):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    sections = [
+        (name, f"{name.lower().replace(' ', '.')}@example.com | +44 20 7946 {rng.randint(1000, 9999)} | London, United Kingdom"),
+        ("Summary", _paragraph(rng, 3)),
+        ("Skills", ", ".join(rng.sample(SKILLS, 6))),
+    ]
+    year = 2024
+    for _ in range(3):
+        start = year - rng.randint(2, 4)
+        sections.append((f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start}-{year})", _paragraph(rng, 5)))
+        year = start
+    sections.append(("Education", f"BSc, {rng.choice(INSTITUTIONS)} ({year - 4}-{year})"))
+    # Each extra page repeats the experience history, like a long academic CV
+    _write_pdf(path, sections, pages)
+
+
+def generate_jd(path, pages, rng):
+    sections = [
+        (f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)}", "London, United Kingdom (hybrid)"),
+        ("About the role", _paragraph(rng, 4)),
+        ("Requirements", "\n".join(f"- {skill}" for skill in rng.sample(SKILLS, 6))),
+        ("Responsibilities", _paragraph(rng, 6)),
+        ("What we offer", _paragraph(rng, 2)),
+    ]
+    _write_pdf(path, sections, pages)
+
+
+def generate_corpus(output_dir, sizes=("small", "medium", "large"), pairs=3, seed=0):
+    # Returns [(size, cv_path, jd_path)], identical for the same seed
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    corpus = []
+    for size in sizes:
+        for index in range(pairs):
+            cv_path = os.path.join(output_dir, f"cv_{size}_{index}.pdf")
+            jd_path = os.path.join(output_dir, f"jd_{size}_{index}.pdf")
+            generate_cv(cv_path, SIZES[size], rng)
+            generate_jd(jd_path, SIZES[size], rng)
+            corpus.append((size, cv_path, jd_path))
+    return corpus
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic CV and JD PDFs.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--pairs", type=int, default=3, help="CV/JD pairs per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for size, cv_path, jd_path in generate_corpus(args.output_dir, args.sizes, args.pairs, args.seed):
+        print(size, cv_path, jd_path)
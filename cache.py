@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Disk-backed cache for OpenAI responses, keyed by a hash of model + temperature + prompt
+CACHE_DIR = os.getenv("CV_JD_CACHE_DIR", os.path.join(".cache", "openai"))
+CACHE_MAX_BYTES = int(os.getenv("CV_JD_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+CACHE_MAX_AGE = int(os.getenv("CV_JD_CACHE_MAX_AGE", 7 * 24 * 3600))
+# Eviction trims to this share of max_bytes so the next writes do not evict again
+EVICT_TARGET = 0.9
+# The sidebar shows stats on every Streamlit rerun, so the directory scan is reused briefly
+STATS_TTL = 5.0
+
+
+def cache_key(model, temperature, prompt, response_format=None):
+    parts = [model, temperature, prompt]
+    if response_format is not None:
+        parts.append(response_format)
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._scanned = None
+        # Running total of entry sizes, so a write only walks the directory when over max_bytes
+        self._size = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)["content"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key, content):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"content": content, "created": time.time()}, f)
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._scanned = None
+            if self._size is not None:
+                self._size += size - replaced
+            over_limit = self._size is None or self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for mtime, size, path in self._entries():
+            if now - mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((mtime, size, path))
+
+        # Drop the oldest entries until the cache fits in max_bytes, with some room to spare
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            entries = []
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TARGET:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def purge(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self._scanned = None
+            self._size = 0
+
+    def stats(self):
+        scanned = self._scanned
+        if scanned is None or time.monotonic() - scanned[0] > STATS_TTL:
+            entries = self._entries()
+            scanned = (time.monotonic(), len(entries), sum(size for _, size, _ in entries))
+            self._scanned = scanned
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": scanned[1],
+            "bytes": scanned[2],
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    # Module-level singleton so the counters survive Streamlit reruns of app.py
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
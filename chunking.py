@@ -0,0 +1,125 @@
+import re
+
+from prompt_budget import count_tokens
+
+# Split long documents on page and section boundaries for parallel parsing,
+# then merge the partial schema objects back deterministically.
+CHUNK_TOKENS = 2000
+SECTION_HEADING = re.compile(
+    r"^\s*(profile|summary|about( me| the role| us)?|(work |professional )?experience|employment( history)?|"
+    r"education|qualifications|skills|technical skills|certifications?|projects|publications|research|"
+    r"teaching|awards|grants|languages|interests|references|responsibilities|requirements|"
+    r"what you('ll| will) do|what we offer|benefits)\s*:?\s*$",
+    re.IGNORECASE,
+)
+# Fields that identify the same entry when it shows up in more than one chunk
+IDENTITY_FIELDS = {
+    "experience": ("job_title", "company", "start_date"),
+    "education": ("degree", "institution"),
+}
+
+
+def _split_sections(page_text):
+    sections, current = [], []
+    for line in page_text.split("\n"):
+        if SECTION_HEADING.match(line) and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def _split_oversized(section, max_tokens):
+    # Fall back to line boundaries for a single section larger than a chunk
+    pieces, current = [], []
+    for line in section.split("\n"):
+        if current and count_tokens("\n".join(current + [line])) > max_tokens:
+            pieces.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_into_chunks(pages, max_tokens=CHUNK_TOKENS):
+    # pages: list of page texts; returns chunk texts in document order
+    sections = []
+    for page_text in pages:
+        for section in _split_sections(page_text):
+            if count_tokens(section) > max_tokens:
+                sections.extend(_split_oversized(section, max_tokens))
+            else:
+                sections.append(section)
+
+    chunks, current = [], []
+    for section in sections:
+        if current and count_tokens("\n".join(current + [section])) > max_tokens:
+            chunks.append("\n".join(current))
+            current = []
+        current.append(section)
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _normalize(value):
+    return re.sub(r"\s+", " ", str(value)).strip().casefold()
+
+
+def _is_empty(value):
+    if isinstance(value, dict):
+        return all(_is_empty(item) for item in value.values())
+    if isinstance(value, list):
+        return all(_is_empty(item) for item in value)
+    return value in ("", None)
+
+
+def _identity(field, item):
+    if isinstance(item, dict) and field in IDENTITY_FIELDS:
+        return tuple(_normalize(item.get(key, "")) for key in IDENTITY_FIELDS[field])
+    if isinstance(item, dict):
+        return tuple(sorted((key, _normalize(value)) for key, value in item.items()))
+    return _normalize(item)
+
+
+def _merge_values(first, second):
+    # Keep the first non-empty value; for strings prefer the more complete one
+    if _is_empty(first):
+        return second
+    if _is_empty(second):
+        return first
+    if isinstance(first, dict) and isinstance(second, dict):
+        return {key: _merge_values(first.get(key), second.get(key)) for key in dict.fromkeys([*first, *second])}
+    if isinstance(first, str) and isinstance(second, str) and len(second.strip()) > len(first.strip()):
+        return second
+    return first
+
+
+def merge_partials(partials):
+    merged = {}
+    for partial in partials:
+        for field, value in partial.items():
+            if isinstance(value, list):
+                items = merged.setdefault(field, [])
+                positions = {_identity(field, item): index for index, item in enumerate(items)}
+                for item in value:
+                    if _is_empty(item):
+                        continue
+                    identity = _identity(field, item)
+                    if identity in positions:
+                        items[positions[identity]] = _merge_values(items[positions[identity]], item)
+                    else:
+                        positions[identity] = len(items)
+                        items.append(item)
+            else:
+                merged[field] = _merge_values(merged.get(field), value)
+
+    # Lists that were empty in every chunk keep the first chunk's placeholder
+    for partial in partials:
+        for field, value in partial.items():
+            if isinstance(value, list) and not merged.get(field):
+                merged[field] = value
+    return merged
@@ -0,0 +1,145 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import observe_stages
+
+# Background jobs: a run keeps going when the Streamlit script that started it
+# reruns, reports progress per stage, and can be cancelled between stages.
+JOB_WORKERS = int(os.getenv("CV_JD_JOB_WORKERS", "4"))
+# Finished jobs kept for later collection; the oldest are dropped first
+JOB_HISTORY = 100
+
+
+class JobCancelled(BaseException):
+    # A BaseException, like asyncio.CancelledError, so stage error handling lets it through
+    pass
+
+
+class Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "queued"
+        self.stages = {}
+        self.outputs = {}
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in ("done", "error", "cancelled")
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def update_stage(self, stage, status):
+        # Called by timed_stage; a new stage is where a cancelled job stops
+        if status == "running":
+            self.check_cancelled()
+        with self._lock:
+            self.stages[stage] = status
+
+    def set_output(self, key, value):
+        with self._lock:
+            self.outputs[key] = value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "stages": dict(self.stages),
+                "outputs": dict(self.outputs),
+                "error": self.error,
+                "created": self.created,
+                "finished": self.finished,
+                "cancelling": self._cancel.is_set() and not self.done,
+            }
+
+
+class InlineJob:
+    # Stands in for a Job when a pipeline runs in the calling thread, e.g. batch
+    # mode and benchmarks: outputs are only collected and it is never cancelled
+    def __init__(self, name=""):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.outputs = {}
+
+    def check_cancelled(self):
+        pass
+
+    def set_output(self, key, value):
+        self.outputs[key] = value
+
+
+class JobRunner:
+    def __init__(self, workers=JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cv-jd-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, *args, **kwargs):
+        # fn is called as fn(job, *args, **kwargs); its return value is the job's result
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            job.check_cancelled()
+            job.status = "running"
+            with observe_stages(job.update_stage):
+                result = fn(job, *args, **kwargs)
+            if result is not None:
+                job.set_output("result", result)
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(self._jobs) - JOB_HISTORY, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job is not None
+
+
+_default_runner = None
+_default_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    # Module-level singleton so jobs outlive Streamlit reruns and are shared across sessions
+    global _default_runner
+    with _default_runner_lock:
+        if _default_runner is None:
+            _default_runner = JobRunner()
+        return _default_runner
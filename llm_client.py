@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import random
+import threading
+
+# One long-lived OpenAI client per API key, plus a rate-limit-aware scheduler.
+# Both live at module level so they survive Streamlit reruns of app.py.
+# openai is imported on first use; it is the slowest import in the app.
+# OpenAI rate limits are per model, so each (key, model) pair gets its own
+# scheduler. Override with a JSON file of {"model": {"rpm": n, "tpm": n}} in
+# OPENAI_MODEL_LIMITS; OPENAI_RPM_LIMIT and OPENAI_TPM_LIMIT apply to every model.
+MODEL_LIMITS_PATH = os.getenv("OPENAI_MODEL_LIMITS")
+DEFAULT_MODEL_LIMITS = {
+    "gpt-4": {"rpm": 500, "tpm": 10000},
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+}
+# Used for models without a known limit
+FALLBACK_LIMITS = {"rpm": 500, "tpm": 10000}
+RPM_LIMIT = os.getenv("OPENAI_RPM_LIMIT")
+TPM_LIMIT = os.getenv("OPENAI_TPM_LIMIT")
+LIMIT_HEADROOM = float(os.getenv("OPENAI_LIMIT_HEADROOM", 0.9))
+COMPLETION_TOKEN_RESERVE = 1000
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+_clients = {}
+_schedulers = {}
+_registry_lock = threading.Lock()
+
+
+def retryable_errors():
+    import openai
+    return (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+def get_client(api_key):
+    from openai import OpenAI
+
+    with _registry_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # Retries and backoff are handled in create_chat_completion
+            client = OpenAI(api_key=api_key, max_retries=0)
+            _clients[api_key] = client
+        return client
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        # Take the tokens now and return how long the caller has to wait for them
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def adjust(self, amount):
+        # Correct an earlier estimate once the real usage is known
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+def load_model_limits(path=MODEL_LIMITS_PATH):
+    limits = {model: dict(model_limits) for model, model_limits in DEFAULT_MODEL_LIMITS.items()}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for model, model_limits in overrides.items():
+            limits.setdefault(model, dict(FALLBACK_LIMITS)).update(model_limits)
+    return limits
+
+
+MODEL_LIMITS = load_model_limits()
+
+
+def model_limits(model):
+    limits = MODEL_LIMITS.get(model, FALLBACK_LIMITS)
+    return int(RPM_LIMIT or limits["rpm"]), int(TPM_LIMIT or limits["tpm"])
+
+
+class RequestScheduler:
+    def __init__(self, rpm=FALLBACK_LIMITS["rpm"], tpm=FALLBACK_LIMITS["tpm"], headroom=LIMIT_HEADROOM):
+        self.requests = TokenBucket(max(rpm * headroom, 1))
+        self.tokens = TokenBucket(max(tpm * headroom, 1))
+
+    def acquire(self, estimated_tokens):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        self.tokens.adjust(actual_tokens - estimated_tokens)
+
+
+def get_scheduler(api_key, model):
+    with _registry_lock:
+        scheduler = _schedulers.get((api_key, model))
+        if scheduler is None:
+            scheduler = RequestScheduler(*model_limits(model))
+            _schedulers[(api_key, model)] = scheduler
+        return scheduler
+
+
+def _retry_delay(error, attempt):
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+    # Full jitter keeps concurrent workers from retrying in lockstep
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def create_chat_completion(api_key, messages, model, **kwargs):
+    client = get_client(api_key)
+    scheduler = get_scheduler(api_key, model)
+    estimated = sum(estimate_tokens(m["content"]) for m in messages) + COMPLETION_TOKEN_RESERVE
+
+    for attempt in range(MAX_RETRIES + 1):
+        scheduler.acquire(estimated)
+        try:
+            response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+        except retryable_errors() as e:
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_retry_delay(e, attempt))
+            continue
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            scheduler.record_usage(estimated, usage.total_tokens)
+        return response
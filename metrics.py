@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Per-stage timing, token usage and cost for each pipeline run.
+# Runs are appended to a JSONL file, and cumulative totals can also be
+# written in the Prometheus text format for a node-exporter textfile collector.
+METRICS_PATH = os.getenv("CV_JD_METRICS_PATH", os.path.join(".metrics", "runs.jsonl"))
+PROMETHEUS_PATH = os.getenv("CV_JD_PROMETHEUS_PATH")
+
+# USD per million tokens: (prompt, completion)
+MODEL_PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+_current_run = ContextVar("current_run", default=None)
+_current_stage = ContextVar("current_stage", default=None)
+_current_scope = ContextVar("current_scope", default="")
+_stage_observer = ContextVar("stage_observer", default=None)
+
+_write_lock = threading.Lock()
+# Stage records can be updated from several threads, e.g. chunks parsed in parallel
+_record_lock = threading.Lock()
+_totals = {}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class RunMetrics:
+    def __init__(self, run_id=None, **labels):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.labels = labels
+        self.started = time.time()
+        self.seconds = 0.0
+        self.status = "ok"
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.stages.append(record)
+
+    def totals(self):
+        totals = {"seconds": round(self.seconds, 3), "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "llm_calls": 0, "cache_hits": 0, "tokens_saved": 0, "cascades": 0, "escalations": 0}
+        for record in self.stages:
+            for field in ("prompt_tokens", "completion_tokens", "cost", "llm_calls", "cache_hits", "tokens_saved", "cascades", "escalations"):
+                totals[field] += record[field]
+        totals["cost"] = round(totals["cost"], 6)
+        return totals
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "started": self.started,
+            "status": self.status,
+            "labels": self.labels,
+            "totals": self.totals(),
+            "stages": self.stages,
+        }
+
+
+@contextmanager
+def track_run(run_id=None, **labels):
+    run = RunMetrics(run_id, **labels)
+    token = _current_run.set(run)
+    started = time.perf_counter()
+    try:
+        yield run
+    except BaseException:
+        run.status = "error"
+        raise
+    finally:
+        run.seconds = time.perf_counter() - started
+        _current_run.reset(token)
+        write_run(run)
+
+
+@contextmanager
+def scope(name):
+    # Prefix stage names, e.g. "CV" turns the "parse" stage into "CV:parse"
+    token = _current_scope.set(name)
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+def scoped(name, fn):
+    def run_in_scope():
+        with scope(name):
+            return fn()
+    return run_in_scope
+
+
+@contextmanager
+def observe_stages(callback):
+    # callback(stage, status) is told when each stage starts ("running") and how it ended
+    token = _stage_observer.set(callback)
+    try:
+        yield
+    finally:
+        _stage_observer.reset(token)
+
+
+@contextmanager
+def timed_stage(name):
+    prefix = _current_scope.get()
+    observer = _stage_observer.get()
+    if observer is not None:
+        observer(f"{prefix}:{name}" if prefix else name, "running")
+    record = {
+        "stage": f"{prefix}:{name}" if prefix else name,
+        "seconds": 0.0,
+        "status": "ok",
+        "llm_calls": 0,
+        "cache_hits": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost": 0.0,
+        "tokens_saved": 0,
+        "cascades": 0,
+        "escalations": 0,
+        "models": [],
+        "page_seconds": [],
+    }
+    token = _current_stage.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["status"] = "error"
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 4)
+        _current_stage.reset(token)
+        run = _current_run.get()
+        if run is not None:
+            run.add(record)
+        if observer is not None:
+            observer(record["stage"], record["status"])
+
+
+def record_llm_call(model, prompt_tokens=0, completion_tokens=0, cached=False):
+    record = _current_stage.get()
+    if record is None:
+        return
+    with _record_lock:
+        record["llm_calls"] += 1
+        record["cache_hits"] += int(cached)
+        record["prompt_tokens"] += prompt_tokens
+        record["completion_tokens"] += completion_tokens
+        record["cost"] = round(record["cost"] + estimate_cost(model, prompt_tokens, completion_tokens), 6)
+        if model not in record["models"]:
+            record["models"].append(model)
+
+
+def record_cache_status(cached):
+    # For local caches such as PDF text, which make no LLM call
+    record = _current_stage.get()
+    if record is not None:
+        with _record_lock:
+            record["cache_hits"] += int(cached)
+
+
+def record_page_timings(page_seconds):
+    # Seconds per PDF page extracted in this stage, in page order
+    record = _current_stage.get()
+    if record is not None:
+        with _record_lock:
+            record["page_seconds"].extend(round(seconds, 4) for seconds in page_seconds)
+
+
+def record_prompt_compaction(original_tokens, compacted_tokens):
+    record = _current_stage.get()
+    if record is not None:
+        with _record_lock:
+            record["tokens_saved"] += max(original_tokens - compacted_tokens, 0)
+
+
+def record_cascade(escalated):
+    # Escalation rate per stage is escalations / cascades
+    record = _current_stage.get()
+    if record is not None:
+        with _record_lock:
+            record["cascades"] += 1
+            record["escalations"] += int(escalated)
+
+
+def write_run(run):
+    data = run.to_dict()
+    with _write_lock:
+        if METRICS_PATH:
+            os.makedirs(os.path.dirname(METRICS_PATH) or ".", exist_ok=True)
+            with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        if PROMETHEUS_PATH:
+            _accumulate(data)
+            _write_prometheus(PROMETHEUS_PATH)
+
+
+def _accumulate(data):
+    runs_key = ("cv_jd_runs_total", (("status", data["status"]),))
+    _totals[runs_key] = _totals.get(runs_key, 0) + 1
+    for record in data["stages"]:
+        labels = (("stage", record["stage"]),)
+        for metric, value in (
+            ("cv_jd_stage_seconds_sum", record["seconds"]),
+            ("cv_jd_stage_seconds_count", 1),
+            ("cv_jd_stage_errors_total", int(record["status"] != "ok")),
+            ("cv_jd_llm_calls_total", record["llm_calls"]),
+            ("cv_jd_cache_hits_total", record["cache_hits"]),
+            ("cv_jd_prompt_tokens_total", record["prompt_tokens"]),
+            ("cv_jd_completion_tokens_total", record["completion_tokens"]),
+            ("cv_jd_cost_usd_total", record["cost"]),
+            ("cv_jd_prompt_tokens_saved_total", record["tokens_saved"]),
+            ("cv_jd_cascades_total", record["cascades"]),
+            ("cv_jd_escalations_total", record["escalations"]),
+            ("cv_jd_pdf_pages_total", len(record["page_seconds"])),
+            ("cv_jd_pdf_page_seconds_sum", sum(record["page_seconds"])),
+        ):
+            _totals[(metric, labels)] = _totals.get((metric, labels), 0) + value
+
+
+def _write_prometheus(path):
+    lines = []
+    for (metric, labels), value in sorted(_totals.items()):
+        label_text = ",".join(f'{key}="{value_}"' for key, value_ in labels)
+        lines.append(f"{metric}{{{label_text}}} {value}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,105 @@
+import io
+import os
+import time
+import hashlib
+import logging
+import threading
+import multiprocessing
+from functools import lru_cache
+from importlib.metadata import version
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import ResponseCache
+
+# PDF text extraction: one layout pass per page, spread over processes for
+# long documents, cached by file content hash
+PDF_CACHE_DIR = os.getenv("CV_JD_PDF_CACHE_DIR", os.path.join(".cache", "pdf_text"))
+PARALLEL_MIN_PAGES = int(os.getenv("CV_JD_PDF_PARALLEL_MIN_PAGES", 8))
+MAX_PROCESSES = int(os.getenv("CV_JD_PDF_MAX_PROCESSES", os.cpu_count() or 1))
+SLOW_PAGE_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+_text_cache = None
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_text_cache():
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = ResponseCache(directory=PDF_CACHE_DIR)
+    return _text_cache
+
+
+def get_pool():
+    # One pool for the whole process, so concurrent documents share MAX_PROCESSES workers.
+    # Workers are spawned rather than forked because the callers run in threads.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+@lru_cache(maxsize=None)
+def extractor_version():
+    # Read from package metadata so pdfplumber is only imported once a PDF is opened
+    return f"pdfplumber-{version('pdfplumber')}"
+
+
+def _open(source):
+    # Accept a file path or in-memory PDF bytes
+    import pdfplumber
+
+    if isinstance(source, (bytes, bytearray)):
+        return pdfplumber.open(io.BytesIO(source))
+    return pdfplumber.open(source)
+
+
+def _extract_page_range(source, start, stop):
+    # Runs in a worker process for large documents, so it opens its own handle
+    pages = []
+    with _open(source) as pdf:
+        for index in range(start, stop):
+            started = time.perf_counter()
+            text = pdf.pages[index].extract_text()
+            pages.append({"page": index + 1, "text": text or "", "seconds": time.perf_counter() - started})
+    return pages
+
+
+def _page_count(source):
+    with _open(source) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pages(source):
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+        label = "uploaded PDF"
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+        label = source
+    cache = get_text_cache()
+    key = hashlib.sha256(extractor_version().encode() + b"\0" + data).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    page_count = _page_count(data)
+    processes = min(MAX_PROCESSES, page_count)
+    if page_count < PARALLEL_MIN_PAGES or processes < 2:
+        pages = _extract_page_range(data, 0, page_count)
+    else:
+        # Contiguous page ranges so each worker parses the document only once
+        step = -(-page_count // processes)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        futures = [get_pool().submit(_extract_page_range, data, start, stop) for start, stop in ranges]
+        pages = [page for future in futures for page in future.result()]
+
+    for page in pages:
+        if page["seconds"] > SLOW_PAGE_SECONDS:
+            logger.warning("%s: page %d took %.2fs to extract", label, page["page"], page["seconds"])
+    cache.put(key, pages)
+    return pages, False
+
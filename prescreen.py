@@ -0,0 +1,113 @@
+import re
+
+import numpy as np
+
+# Local BM25 index used to rank CVs against a JD before any LLM call.
+# Postings are kept as flat CSR-style arrays so new CVs can be appended
+# and every document is scored in one vectorized pass.
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to was were will with
+you your we they he she i my me us not but if so than then there these those which who whom what when where
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class PrescreenIndex:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        self.doc_ids = []
+        self._doc_positions = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.term_ids = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_positions
+
+    def add_documents(self, documents):
+        # documents: iterable of (doc_id, text); ids already in the index are skipped
+        new_indptr, new_terms, new_counts = [], [], []
+        offset = int(self.indptr[-1])
+        for doc_id, text in documents:
+            if doc_id in self._doc_positions:
+                continue
+            terms = np.array([self.vocab.setdefault(token, len(self.vocab)) for token in tokenize(text)], dtype=np.int64)
+            unique, counts = np.unique(terms, return_counts=True)
+            new_terms.append(unique)
+            new_counts.append(counts.astype(np.float32))
+            offset += len(unique)
+            new_indptr.append(offset)
+            self._doc_positions[doc_id] = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+        if new_indptr:
+            self.indptr = np.concatenate([self.indptr, np.array(new_indptr, dtype=np.int64)])
+            self.term_ids = np.concatenate([self.term_ids] + new_terms)
+            self.counts = np.concatenate([self.counts] + new_counts)
+
+    def score(self, query_text):
+        n_docs = len(self.doc_ids)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        query_terms = np.array(sorted({self.vocab[token] for token in tokenize(query_text) if token in self.vocab}), dtype=np.int64)
+        if n_docs == 0 or len(query_terms) == 0:
+            return scores
+
+        doc_of_posting = np.repeat(np.arange(n_docs), np.diff(self.indptr))
+        doc_lengths = np.bincount(doc_of_posting, weights=self.counts, minlength=n_docs)
+        avg_length = doc_lengths.mean() or 1.0
+        doc_freq = np.bincount(self.term_ids, minlength=len(self.vocab))
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        mask = np.isin(self.term_ids, query_terms)
+        tf = self.counts[mask]
+        docs = doc_of_posting[mask]
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[docs] / avg_length)
+        contributions = idf[self.term_ids[mask]] * tf * (self.k1 + 1) / (tf + norm)
+        return np.bincount(docs, weights=contributions, minlength=n_docs).astype(np.float32)
+
+    def rank(self, query_text, top_n=None, min_score=None, doc_ids=None):
+        # Returns [(doc_id, score)] best first, optionally restricted to doc_ids
+        scores = self.score(query_text)
+        positions = np.arange(len(self.doc_ids))
+        if doc_ids is not None:
+            positions = np.array([self._doc_positions[doc_id] for doc_id in doc_ids if doc_id in self._doc_positions], dtype=np.int64)
+        if min_score is not None:
+            positions = positions[scores[positions] >= min_score]
+        order = positions[np.argsort(-scores[positions], kind="stable")]
+        if top_n is not None:
+            order = order[:top_n]
+        return [(self.doc_ids[position], float(scores[position])) for position in order]
+
+    def save(self, path):
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                params=np.array([self.k1, self.b]),
+                vocab=np.array(terms, dtype=str),
+                doc_ids=np.array(self.doc_ids, dtype=str),
+                indptr=self.indptr,
+                term_ids=self.term_ids,
+                counts=self.counts,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            index = cls(k1=k1, b=b)
+            index.vocab = {term: position for position, term in enumerate(data["vocab"].tolist())}
+            index.doc_ids = data["doc_ids"].tolist()
+            index._doc_positions = {doc_id: position for position, doc_id in enumerate(index.doc_ids)}
+            index.indptr = data["indptr"]
+            index.term_ids = data["term_ids"]
+            index.counts = data["counts"]
+        return index
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# SQLite store of extracted text, parsed and enriched profiles, keyed by
+# document content hash and prompt version, so a document seen before is
+# never parsed again and a changed enrichment prompt only re-runs enrichment.
+STORE_PATH = os.getenv("CV_JD_STORE_PATH", os.path.join(".data", "profiles.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    content_hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    pages_json TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parsed (
+    content_hash TEXT NOT NULL,
+    parse_version TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    parsed_json TEXT NOT NULL,
+    name TEXT,
+    email TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (content_hash, parse_version)
+);
+CREATE INDEX IF NOT EXISTS parsed_email ON parsed (email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS parsed_name ON parsed (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS enriched (
+    content_hash TEXT NOT NULL,
+    parse_version TEXT NOT NULL,
+    enrich_version TEXT NOT NULL,
+    enriched_json TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (content_hash, parse_version, enrich_version)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    cv_hash TEXT NOT NULL,
+    jd_hash TEXT NOT NULL,
+    flagging_response TEXT,
+    missing_points TEXT,
+    questionnaire_response TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_jd ON runs (jd_hash, created);
+CREATE INDEX IF NOT EXISTS runs_cv ON runs (cv_hash, created);
+"""
+
+
+def content_hash(source):
+    # source is a file path or the raw PDF bytes
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prompt_version(*parts):
+    # Identify a prompt template (plus any options that change its output) by hash
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:16]
+
+
+class ProfileStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread; WAL lets several sessions read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def save_pages(self, doc_hash, kind, pages):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO documents (content_hash, kind, pages_json, created) VALUES (?, ?, ?, ?)",
+                (doc_hash, kind, json.dumps(pages), time.time()),
+            )
+
+    def get_pages(self, doc_hash):
+        row = self._connect().execute("SELECT pages_json FROM documents WHERE content_hash = ?", (doc_hash,)).fetchone()
+        return json.loads(row["pages_json"]) if row else None
+
+    def save_parsed(self, doc_hash, parse_version, kind, parsed):
+        name = parsed.get("name") if isinstance(parsed, dict) else None
+        email = parsed.get("email") if isinstance(parsed, dict) else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parsed (content_hash, parse_version, kind, parsed_json, name, email, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_hash, parse_version, kind, json.dumps(parsed), name or None, email or None, time.time()),
+            )
+
+    def get_parsed(self, doc_hash, parse_version):
+        row = self._connect().execute(
+            "SELECT parsed_json FROM parsed WHERE content_hash = ? AND parse_version = ?",
+            (doc_hash, parse_version),
+        ).fetchone()
+        return json.loads(row["parsed_json"]) if row else None
+
+    def save_enriched(self, doc_hash, parse_version, enrich_version, enriched):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO enriched (content_hash, parse_version, enrich_version, enriched_json, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (doc_hash, parse_version, enrich_version, json.dumps(enriched), time.time()),
+            )
+
+    def get_enriched(self, doc_hash, parse_version, enrich_version):
+        row = self._connect().execute(
+            "SELECT enriched_json FROM enriched WHERE content_hash = ? AND parse_version = ? AND enrich_version = ?",
+            (doc_hash, parse_version, enrich_version),
+        ).fetchone()
+        return json.loads(row["enriched_json"]) if row else None
+
+    def stale_enrichments(self, kind, parse_version, enrich_version):
+        # Parsed profiles that have no enrichment for the current enrichment prompt
+        rows = self._connect().execute(
+            "SELECT p.content_hash, p.parsed_json FROM parsed p "
+            "LEFT JOIN enriched e ON e.content_hash = p.content_hash AND e.parse_version = p.parse_version "
+            "AND e.enrich_version = ? "
+            "WHERE p.kind = ? AND p.parse_version = ? AND e.content_hash IS NULL",
+            (enrich_version, kind, parse_version),
+        ).fetchall()
+        return [(row["content_hash"], json.loads(row["parsed_json"])) for row in rows]
+
+    def find_profiles(self, name=None, email=None):
+        clauses, params = [], []
+        if name:
+            clauses.append("name = ? COLLATE NOCASE")
+            params.append(name)
+        if email:
+            clauses.append("email = ? COLLATE NOCASE")
+            params.append(email)
+        where = " AND ".join(clauses) or "1"
+        rows = self._connect().execute(
+            f"SELECT content_hash, parse_version, kind, name, email, created FROM parsed WHERE {where} ORDER BY created DESC",
+            params,
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_run(self, run_id, cv_hash, jd_hash, flagging_response, missing_points, questionnaire_response=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, cv_hash, jd_hash, flagging_response, missing_points, "
+                "questionnaire_response, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, cv_hash, jd_hash, flagging_response, json.dumps(missing_points), questionnaire_response, time.time()),
+            )
+
+    def runs_for_jd(self, jd_hash):
+        rows = self._connect().execute(
+            "SELECT * FROM runs WHERE jd_hash = ? ORDER BY created DESC", (jd_hash,)
+        ).fetchall()
+        return [dict(row, missing_points=json.loads(row["missing_points"] or "[]")) for row in rows]
+
+    def runs_for_candidate(self, name=None, email=None):
+        hashes = {profile["content_hash"] for profile in self.find_profiles(name=name, email=email)}
+        if not hashes:
+            return []
+        placeholders = ",".join("?" * len(hashes))
+        rows = self._connect().execute(
+            f"SELECT * FROM runs WHERE cv_hash IN ({placeholders}) ORDER BY created DESC", sorted(hashes)
+        ).fetchall()
+        return [dict(row, missing_points=json.loads(row["missing_points"] or "[]")) for row in rows]
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    # Module-level singleton, like the response cache, so it survives Streamlit reruns
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ProfileStore()
+        return _default_store
@@ -0,0 +1,94 @@
+import json
+from functools import lru_cache
+
+from llm_client import estimate_tokens
+from metrics import record_prompt_compaction
+
+# Compact, budget-aware serialization of parsed/enriched documents for prompts.
+# tiktoken is used for exact counts when installed; otherwise a
+# four-characters-per-token estimate is close enough for budgeting.
+# The encoding is loaded on first use rather than on every app start.
+# Token budget for the document data embedded in each stage's prompt
+PROMPT_BUDGETS = {
+    "enrich": 3000,
+    "flagging": 5000,
+}
+STRING_LIMITS = (600, 300, 150, 80)
+TRUNCATION_MARK = "..."
+
+
+@lru_cache(maxsize=None)
+def _get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return estimate_tokens(text)
+
+
+def compact_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def prune_empty(data, keep=()):
+    # Drop empty placeholder fields; keys in keep are retained so the model still sees them
+    if isinstance(data, dict):
+        pruned = {}
+        for key, value in data.items():
+            value = value if key in keep else prune_empty(value, keep)
+            if key in keep or value not in ("", None, [], {}):
+                pruned[key] = value
+        return pruned
+    if isinstance(data, list):
+        return [item for item in (prune_empty(item, keep) for item in data) if item not in ("", None, [], {})]
+    if isinstance(data, str):
+        return data.strip()
+    return data
+
+
+def _truncate_strings(data, limit):
+    if isinstance(data, dict):
+        return {key: _truncate_strings(value, limit) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_truncate_strings(item, limit) for item in data]
+    if isinstance(data, str) and len(data) > limit:
+        return data[:limit].rstrip() + TRUNCATION_MARK
+    return data
+
+
+def _drop_last_list_item(data, keep=()):
+    # Shorten the longest top-level list, e.g. the oldest roles in experience
+    lists = [key for key, value in data.items() if key not in keep and isinstance(value, list) and len(value) > 1]
+    if not lists:
+        return False
+    longest = max(lists, key=lambda key: len(compact_json(data[key])))
+    data[longest] = data[longest][:-1]
+    return True
+
+
+def fit_to_budget(data, budget, keep=()):
+    data = prune_empty(data, keep)
+    text = compact_json(data)
+    for limit in STRING_LIMITS:
+        if count_tokens(text) <= budget:
+            return text
+        data = _truncate_strings(data, limit)
+        text = compact_json(data)
+    while count_tokens(text) > budget and isinstance(data, dict) and _drop_last_list_item(data, keep):
+        text = compact_json(data)
+    return text
+
+
+def compact_for_prompt(data, budget, keep=()):
+    # Returns the serialized data and records the saving against the current stage
+    original = count_tokens(json.dumps(data, indent=2))
+    text = fit_to_budget(data, budget, keep)
+    record_prompt_compaction(original, count_tokens(text))
+    return text
@@ -0,0 +1,370 @@
+import json
+
+from prompt_budget import compact_for_prompt
+
+# Schemas, prompt builders and the structured-output formats derived from them.
+# Kept out of app.py so they are built once per process, not on every Streamlit rerun.
+
+# JSON schemas
+CV_JSON_SCHEMA = {
+    "name": "",
+    "email": "",
+    "phone": "",
+    "country": "",
+    "city": "",
+    "summary": "",
+    "skills": [
+        {
+            'specialized skill': "",
+            'common skill': ""
+        }
+    ],
+    "experience": [
+        {
+            "job_title": "",
+            "company": "",
+            "start_date": "",
+            "end_date": "",
+            "description": ""
+        }
+    ],
+    "education": [
+        {
+            "degree": "",
+            "institution": "",
+            "start_year": "",
+            "end_year": ""
+        }
+    ],
+   "enrichment parameters": [
+        {
+            "Employment Pattern & Progression": "",
+            "Company Type & Sector": "",
+            "Education Quality & Ranking": "",
+            "Skill Demand & Market Relevance": "",
+            "Leadership Experience": "",
+            "Budget & Project Management": "",
+            "International Experience & Mobility": "",
+            "Soft Skills from Sales Calls": "",
+            "Personality & Behavioral Traits": [
+                {
+                "Openness": "",
+                "Conscientiousness": "",
+                "Extraversion": "",
+                "Agreeableness": "",
+                "Neuroticism": ""
+                }
+            ],
+            "Future Career Goals (Sales-Inferred)": "",
+            "Salary Expectations (Sales-Inferred)": "",
+            "JD Enrichment with Implied Preferences": "",
+            "Cultural Fit Indicators": ""
+        }
+    ]
+}
+
+JD_JSON_SCHEMA = {
+    "country": "",
+    "city": "",
+    "summary": "",
+    "skills": [
+        {
+            'specialized skill': "",
+            'common skill': ""
+        }
+    ],
+    "experience": [
+        {
+            "job_title": "",
+            "company": "",
+            "start_date": "",
+            "end_date": "",
+            "description": ""
+        }
+    ],
+    "education": [
+        {
+            "degree": "",
+            "institution": "",
+            "start_year": "",
+            "end_year": ""
+        }
+    ],
+   "enrichment parameters": [
+        {
+            "Employment Pattern & Progression": "",
+            "Company Type & Sector": "",
+            "Education Quality & Ranking": "",
+            "Skill Demand & Market Relevance": "",
+            "Leadership Experience": "",
+            "Budget & Project Management": "",
+            "International Experience & Mobility": "",
+            "Soft Skills from Sales Calls": "",
+            "Future Career Goals (Sales-Inferred)": "",
+            "Salary Expectations (Sales-Inferred)": "",
+            "JD Enrichment with Implied Preferences": "",
+            "Cultural Fit Indicators": ""
+        }
+    ]
+}
+
+SCHEMAS = {"cv": CV_JSON_SCHEMA, "jd": JD_JSON_SCHEMA}
+# The parse leaves the enrichment parameters empty in whatever shape the model
+# picks ({}, [] or left out), and the enrichment answer holds only that subtree
+PARSE_TEMPLATES = {
+    kind: {key: value for key, value in schema.items() if key != "enrichment parameters"}
+    for kind, schema in SCHEMAS.items()
+}
+ENRICH_TEMPLATES = {kind: {"enrichment parameters": schema["enrichment parameters"]} for kind, schema in SCHEMAS.items()}
+
+# Serialized once rather than on every prompt build
+CV_SCHEMA_TEXT = json.dumps(CV_JSON_SCHEMA, indent=2)
+JD_SCHEMA_TEXT = json.dumps(JD_JSON_SCHEMA, indent=2)
+CV_ENRICHMENT_SCHEMA_TEXT = json.dumps(ENRICH_TEMPLATES["cv"], indent=2)
+JD_ENRICHMENT_SCHEMA_TEXT = json.dumps(ENRICH_TEMPLATES["jd"], indent=2)
+
+def buildCV_prompt(resume_text):
+    prompt = f"""
+You are an expert resume parser. Convert the resume text below into this JSON format. Fill in all the relevant fields. Leave the enrichment_parameters field empty.
+The JSON schema is as follows:
+
+{CV_SCHEMA_TEXT}
+
+Resume:
+\"\"\"
+{resume_text}
+\"\"\"
+"""
+    return prompt
+
+def buildJD_prompt(job_description_text):
+    prompt = f"""
+You are an expert Job description parser. Convert the job description text below into this JSON format. Fill in all the relevant fields. Leave the enrichment parameters field empty.
+Note that the json schema resembles a resume schema. 
+This is because the end goal is to match the resume with the job description. 
+However, keep in mind that the schema is to be filled with the job description data.
+Again, the enrichment parameters field should be left empty.
+The JSON schema is as follows:
+
+{JD_SCHEMA_TEXT}
+
+Job Description:
+\"\"\"
+{job_description_text}
+\"\"\"
+"""
+    return prompt
+
+# Enrichment prompts
+CV_ENRICHMENT_GUIDE = """- Employment Pattern & Progression: Describe the career trajectory and progression.
+- Company Type & Sector: Identify the type and sector of companies worked for.
+- Education Quality & Ranking: Assess the quality and ranking of educational institutions.
+- Skill Demand & Market Relevance: Evaluate the relevance of skills in the current market.
+- Leadership Experience: Highlight leadership roles and responsibilities.
+- Budget & Project Management: Detail experience in managing budgets and projects.
+- International Experience & Mobility: Indicate international exposure and mobility.
+- Soft Skills from Sales Calls: Infer soft skills demonstrated in sales or communication.
+- Personality & Behavioral Traits: Deduce personality traits and behaviors.
+- Future Career Goals (Sales-Inferred): Predict future career aspirations based on sales roles.
+- Salary Expectations (Sales-Inferred): Estimate salary expectations based on experience.
+- JD Enrichment with Implied Preferences: Enrich job descriptions with implied preferences.
+- Cultural Fit Indicators: Suggest cultural fit indicators for potential roles.
+
+Also, analyze the candidate's Personality & Behavioral Traits according to the Big Five (OCEAN) model. Use the resume's tone, accomplishments, language, career path and the above inferred enrichment parameters to estimate the following traits:
+Personality & Behavioral Traits: 
+    "Openness": "How open is the candidate to new experiences and ideas?"
+    "Conscientiousness": "How organized and dependable is the candidate?"
+    "Extraversion": "How outgoing and energetic is the candidate?"
+    "Agreeableness": "How friendly and compassionate is the candidate?"
+    "Neuroticism": "How emotionally stable is the candidate?"
+
+For each Personality and Behavioral Trait, provide a rating (High, Moderate, or Low)."""
+
+JD_ENRICHMENT_GUIDE = """- Employment Pattern & Progression: Describe the required career trajectory and progression for an ideal candidate.
+- Company Type & Sector: Identify the type and sector of company.
+- Education Quality & Ranking: potential quality and ranking of educational institutions of the candidate.
+- Skill Demand & Market Relevance: Evaluate the relevance of skills in the current market.
+- Leadership Experience: Highlight leadership roles and responsibilities for a potential candidate.
+- Budget & Project Management: Detail experience in managing budgets and projects.
+- International Experience & Mobility: Indicate international exposure and mobility for a potential candidate.
+- Soft Skills from Sales Calls: Infer soft skills demonstrated in sales or communication.
+- Personality & Behavioral Traits: Deduce personality traits and behaviors for this role.
+- Future Career Goals (Sales-Inferred): Predict future career aspirations based on sales roles.
+- Salary Expectations (Sales-Inferred): Estimate salary expectations for this role.
+- JD Enrichment with Implied Preferences: leave this empty
+- Cultural Fit Indicators: Suggest cultural fit indicators for potential candidates.
+
+Also, analyze a potential candidate's Personality & Behavioral Traits according to the Big Five (OCEAN) model. Use the job description's tone, requiremets, language and the above inferred enrichment parameters to estimate the following traits:
+Personality & Behavioral Traits: 
+    "Openness": "How open is the candidate to new experiences and ideas?"
+    "Conscientiousness": "How organized and dependable is the candidate?"
+    "Extraversion": "How outgoing and energetic is the candidate?"
+    "Agreeableness": "How friendly and compassionate is the candidate?"
+    "Neuroticism": "How emotionally stable is the candidate?"
+
+For each Personality and Behavioral Trait, provide a rating (High, Moderate, or Low)."""
+
+# With a token budget the data is sent compactly: no indentation, no empty
+# placeholders, long sections trimmed to fit
+def _prompt_data(data, budget, keep=()):
+    if budget is None:
+        return json.dumps(data, indent=2)
+    return compact_for_prompt(data, budget, keep)
+
+def buildCV_enrichment_prompt(cv_data, budget=None):
+    prompt = f"""
+You are an expert in CV enrichment. Analyze the provided CV data and infer the following enrichment parameters:
+{CV_ENRICHMENT_GUIDE}
+
+Here is the CV data:
+{_prompt_data(cv_data, budget, keep=("enrichment parameters",))}
+
+Please analyze and fill in the enrichment parameters. Return a JSON object with only the "enrichment parameters" key, in this format:
+
+{CV_ENRICHMENT_SCHEMA_TEXT}
+
+Please respond ONLY with raw JSON. Do not include explanations, markdown, or code block formatting.
+
+"""
+    return prompt
+
+def buildJD_enrichment_prompt(jd_data, budget=None):
+    prompt = f"""
+You are an expert in Job Description enrichment. Analyze the provided Job description data and infer the following enrichment parameters:
+{JD_ENRICHMENT_GUIDE}
+
+Here is the job description data:
+{_prompt_data(jd_data, budget, keep=("enrichment parameters",))}
+
+Please analyze and fill in the enrichment parameters. Return a JSON object with only the "enrichment parameters" key, in this format:
+
+{JD_ENRICHMENT_SCHEMA_TEXT}
+
+Please respond ONLY with raw JSON. Do not include explanations, markdown, or code block formatting.
+
+"""
+    return prompt
+
+# Single-pass prompts: parse and enrich in one call
+def buildCV_single_pass_prompt(resume_text):
+    prompt = f"""
+You are an expert resume parser and CV enrichment analyst. Convert the resume text below into this JSON format and fill in all the relevant fields, including the enrichment parameters.
+The JSON schema is as follows:
+
+{CV_SCHEMA_TEXT}
+
+To fill in the enrichment parameters, infer the following from the resume:
+{CV_ENRICHMENT_GUIDE}
+
+Resume:
+\"\"\"
+{resume_text}
+\"\"\"
+"""
+    return prompt
+
+def buildJD_single_pass_prompt(job_description_text):
+    prompt = f"""
+You are an expert Job description parser and enrichment analyst. Convert the job description text below into this JSON format and fill in all the relevant fields, including the enrichment parameters.
+Note that the json schema resembles a resume schema. 
+This is because the end goal is to match the resume with the job description. 
+However, keep in mind that the schema is to be filled with the job description data.
+The JSON schema is as follows:
+
+{JD_SCHEMA_TEXT}
+
+To fill in the enrichment parameters, infer the following from the job description:
+{JD_ENRICHMENT_GUIDE}
+
+Job Description:
+\"\"\"
+{job_description_text}
+\"\"\"
+"""
+    return prompt
+
+def buildFlagging_prompt(enriched_cv, enriched_jd, budget=None):
+    # The budget is shared evenly between the two documents
+    half_budget = None if budget is None else budget // 2
+    prompt = f"""
+Candidate CV:
+{_prompt_data(enriched_cv, half_budget)}
+
+Job Description:
+{_prompt_data(enriched_jd, half_budget)}
+
+Please answer the following questions:
+1. Could you please give me an overview of this candidate's CV?
+2. Could you expand on the missing information that you pointed out? Please explain why they should be important.
+3. This candidate is applying for the role described in the Job Description. Given the role, what key information is missing from the CV? Sum it up in 5 points.
+"""
+    return prompt
+
+def buildQuestionnaire_prompt(missing_points):
+    prompt = f"""
+Based on the missing points identified earlier, please draw up a 5-question questionnaire to be asked during an interview with the candidate. 
+These questions should be formulated in a way that can give the candidate the possibility to explain why that information is missing. 
+One question for each of the points mentioned below:
+
+{json.dumps(missing_points, indent=2)}
+"""
+    return prompt
+
+# Flagging and questionnaire in one schema-constrained response
+ANALYSIS_JSON_SCHEMA = {
+    "overview": "",
+    "missing_information": [
+        {
+            "point": "",
+            "why_it_matters": ""
+        }
+    ],
+    "interview_questions": [
+        {
+            "missing_point": "",
+            "question": ""
+        }
+    ]
+}
+
+def buildAnalysis_prompt(enriched_cv, enriched_jd, budget=None):
+    half_budget = None if budget is None else budget // 2
+    prompt = f"""
+Candidate CV:
+{_prompt_data(enriched_cv, half_budget)}
+
+Job Description:
+{_prompt_data(enriched_jd, half_budget)}
+
+This candidate is applying for the role described in the Job Description. Please provide:
+1. overview: an overview of this candidate's CV.
+2. missing_information: the 5 most important pieces of key information missing from the CV given the role, each with an explanation of why it is important.
+3. interview_questions: a 5-question questionnaire to be asked during an interview with the candidate, one question for each missing point. These questions should be formulated in a way that can give the candidate the possibility to explain why that information is missing.
+"""
+    return prompt
+
+# Build a strict JSON Schema from one of the example templates
+def to_json_schema(template):
+    if isinstance(template, dict):
+        return {
+            "type": "object",
+            "properties": {key: to_json_schema(value) for key, value in template.items()},
+            "required": list(template),
+            "additionalProperties": False,
+        }
+    if isinstance(template, list):
+        return {"type": "array", "items": to_json_schema(template[0])}
+    return {"type": "string"}
+
+_response_formats = {}
+
+def strict_response_format(schema_name, template):
+    # The strict schema for each template is built once
+    response_format = _response_formats.get(schema_name)
+    if response_format is None:
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {"name": schema_name, "strict": True, "schema": to_json_schema(template)},
+        }
+        _response_formats[schema_name] = response_format
+    return response_format
@@ -0,0 +1,86 @@
+import json
+import threading
+from collections import OrderedDict
+
+# Reports are rendered in memory only when a download is asked for, and
+# memoized per run so clicking the same download twice lays it out once.
+# fpdf is imported on first render, not on every Streamlit rerun.
+REPORT_CACHE_SIZE = 64
+
+_rendered = OrderedDict()
+_rendered_lock = threading.Lock()
+
+
+def _latin1(text):
+    # The core PDF fonts only cover latin-1
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def _pdf_bytes(pdf):
+    output = pdf.output(dest="S")
+    # PyFPDF returns a latin-1 str, fpdf2 returns a bytearray
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+def render_pdf(text):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, _latin1(text))
+    return _pdf_bytes(pdf)
+
+
+def render_combined_report(title, sections):
+    # sections: (heading, body) pairs, one page per candidate
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.multi_cell(0, 10, _latin1(title))
+    pdf.set_font("Arial", size=12)
+    pdf.multi_cell(0, 10, f"{len(sections)} candidates")
+    for heading, body in sections:
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.multi_cell(0, 10, _latin1(heading))
+        pdf.set_font("Arial", size=12)
+        pdf.multi_cell(0, 8, _latin1(body))
+    return _pdf_bytes(pdf)
+
+
+def memoized(run_id, name, render):
+    key = (run_id, name)
+    with _rendered_lock:
+        if key in _rendered:
+            _rendered.move_to_end(key)
+            return _rendered[key]
+    data = render()
+    with _rendered_lock:
+        _rendered[key] = data
+        while len(_rendered) > REPORT_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return data
+
+
+def run_artifacts(run_id, outputs):
+    # Zero-argument callables per file, as st.download_button accepts for deferred data
+    renderers = {
+        "flagging_output.pdf": lambda: render_pdf(outputs.get("flagging_response") or ""),
+        "questionnaire.pdf": lambda: render_pdf(outputs.get("questionnaire_response") or ""),
+        "enriched_cv.json": lambda: json.dumps(outputs.get("enriched_cv"), indent=4).encode("utf-8"),
+        "enriched_jd.json": lambda: json.dumps(outputs.get("enriched_jd"), indent=4).encode("utf-8"),
+    }
+    return {
+        name: (lambda name=name, render=render: memoized(run_id, name, render))
+        for name, render in renderers.items()
+    }
+
+
+def candidate_section(heading, flagging_response, questionnaire_response=None):
+    body = flagging_response or ""
+    if questionnaire_response:
+        body += "\n\nInterview Questions\n\n" + questionnaire_response
+    return heading, body
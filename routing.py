@@ -0,0 +1,74 @@
+import os
+import json
+import logging
+
+from metrics import record_cascade
+
+# Per-stage model routing. A stage with one model always uses it; a stage with
+# several is a cascade: the cheapest model goes first and the output moves up
+# to the next model only when it fails validation or looks low-confidence.
+# Structured-output stages (single_pass, analysis) need json_schema support.
+# Override with a JSON file of {"stage": ["model", ...]} in CV_JD_MODEL_ROUTES.
+ROUTES_PATH = os.getenv("CV_JD_MODEL_ROUTES")
+DEFAULT_ROUTES = {
+    "parse": ["gpt-4o-mini", "gpt-4"],
+    "enrich": ["gpt-4o-mini", "gpt-4"],
+    "single_pass": ["gpt-4o-mini", "gpt-4o"],
+    "analysis": ["gpt-4o-mini", "gpt-4o"],
+    # Streamed to the UI as it is generated, so these use the first model only
+    "flagging": ["gpt-4"],
+    "questionnaire": ["gpt-4o-mini"],
+}
+
+logger = logging.getLogger(__name__)
+
+
+class Escalate(ValueError):
+    # Output that should go to a larger model, but is still usable if none is left
+    def __init__(self, reason, value):
+        super().__init__(reason)
+        self.reason = reason
+        self.value = value
+
+
+def load_routes(path=ROUTES_PATH):
+    routes = dict(DEFAULT_ROUTES)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for stage, models in overrides.items():
+            routes[stage] = [models] if isinstance(models, str) else list(models)
+    return routes
+
+
+MODEL_ROUTES = load_routes()
+
+
+def stage_models(stage):
+    return MODEL_ROUTES[stage]
+
+
+def run_cascade(stage, attempt):
+    # attempt(model) returns the validated result, raising Escalate (or ValueError
+    # for unusable output) to move on to the next model
+    models = stage_models(stage)
+    for index, model in enumerate(models):
+        last = index == len(models) - 1
+        try:
+            value = attempt(model)
+        except Escalate as e:
+            if last:
+                value = e.value
+            else:
+                logger.info("Escalating %s from %s: %s", stage, model, e)
+                continue
+        except ValueError as e:
+            if last:
+                if len(models) > 1:
+                    record_cascade(escalated=index > 0)
+                raise
+            logger.info("Escalating %s from %s: %s", stage, model, e)
+            continue
+        if len(models) > 1:
+            record_cascade(escalated=index > 0)
+        return value
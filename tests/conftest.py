@@ -0,0 +1,32 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The app modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_openai(monkeypatch, tmp_path):
+    # Replaces the API with answer(model, prompt) and gives app an empty response cache;
+    # returns a function to install the answers, which returns the (model, prompt) calls made
+    import app
+    from cache import ResponseCache
+
+    calls = []
+
+    def install(answer):
+        def create_chat_completion(api_key, messages, model, **kwargs):
+            prompt = messages[0]["content"]
+            calls.append((model, prompt))
+            content = answer(model, prompt)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+        monkeypatch.setattr(app, "create_chat_completion", create_chat_completion)
+        return calls
+
+    cache = ResponseCache(directory=str(tmp_path / "cache"))
+    monkeypatch.setattr(app, "get_response_cache", lambda: cache)
+    return install
@@ -0,0 +1,90 @@
+import json
+
+from chunking import merge_partials, split_into_chunks
+from prompt_budget import count_tokens
+
+
+def test_short_document_is_one_chunk():
+    pages = ["Jane Doe\nSales Manager", "Education\nBSc Economics"]
+    assert split_into_chunks(pages, max_tokens=2000) == ["\n".join(pages)]
+
+
+def test_chunks_fit_the_budget_and_keep_document_order():
+    sections = [f"Experience\nRole {number}:\n" + "\n".join(["Closed enterprise deals across the region"] * 20) for number in range(6)]
+    pages = ["\n".join(sections[:3]), "\n".join(sections[3:])]
+    chunks = split_into_chunks(pages, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 200 for chunk in chunks)
+    text = "\n".join(chunks)
+    positions = [text.index(f"Role {number}:") for number in range(6)]
+    assert positions == sorted(positions)
+
+
+def test_blank_pages_produce_no_chunks():
+    assert split_into_chunks(["", "  \n "], max_tokens=100) == []
+
+
+def test_duplicate_entries_across_chunks_are_merged():
+    first = {
+        "name": "Jane Doe",
+        "experience": [
+            {"job_title": "Sales Manager", "company": "Acme", "start_date": "2019", "end_date": "", "description": "Led a team"},
+        ],
+    }
+    second = {
+        "name": "",
+        "experience": [
+            {"job_title": "SALES MANAGER", "company": "ACME", "start_date": "2019", "end_date": "2023",
+             "description": "Led a team of eight account executives"},
+            {"job_title": "Account Executive", "company": "Beta", "start_date": "2015", "end_date": "2019", "description": ""},
+        ],
+    }
+    merged = merge_partials([first, second])
+
+    assert merged["name"] == "Jane Doe"
+    assert len(merged["experience"]) == 2
+    manager = merged["experience"][0]
+    assert manager["job_title"] == "Sales Manager"
+    assert manager["end_date"] == "2023"
+    assert manager["description"] == "Led a team of eight account executives"
+    assert merged["experience"][1]["company"] == "Beta"
+
+
+def test_identical_skills_are_not_repeated():
+    skill = {"specialized skill": "Salesforce", "common skill": "Negotiation"}
+    merged = merge_partials([{"skills": [skill]}, {"skills": [dict(skill)]}])
+    assert merged["skills"] == [skill]
+
+
+def test_empty_placeholder_list_is_kept_when_no_chunk_fills_it():
+    placeholder = [{"degree": "", "institution": "", "start_year": "", "end_year": ""}]
+    merged = merge_partials([{"education": placeholder}, {"education": list(placeholder)}])
+    assert merged["education"] == placeholder
+
+
+def test_empty_placeholder_is_dropped_next_to_real_entries():
+    placeholder = {"degree": "", "institution": "", "start_year": "", "end_year": ""}
+    degree = {"degree": "BSc Economics", "institution": "LSE", "start_year": "2008", "end_year": "2011"}
+    merged = merge_partials([{"education": [placeholder]}, {"education": [degree]}])
+    assert merged["education"] == [degree]
+
+
+def test_chunk_with_nothing_to_extract_does_not_escalate(fake_openai):
+    import app
+    from prompts import PARSE_TEMPLATES, buildCV_prompt
+    from routing import stage_models
+
+    def answer(model, prompt):
+        # Every field left empty, as for a page with nothing to extract
+        parsed = dict(PARSE_TEMPLATES["cv"])
+        if "References" not in prompt.rsplit("Resume:", 1)[-1]:
+            parsed["name"] = "Jane Doe"
+        return json.dumps(parsed)
+
+    calls = fake_openai(answer)
+    pages = ["Jane Doe\n" + "\n".join(["Closed enterprise deals across the region"] * 30), "References\nAvailable on request"]
+    parsed = app.parse_document_chunked(pages, buildCV_prompt, "sk-test", max_chunk_tokens=200, kind="cv")
+
+    assert parsed["name"] == "Jane Doe"
+    assert {model for model, _ in calls} == {stage_models("parse")[0]}
@@ -0,0 +1,14 @@
+from metrics import record_page_timings, timed_stage, track_run
+
+
+def test_page_timings_reach_the_stage_record(monkeypatch):
+    monkeypatch.setattr("metrics.METRICS_PATH", None)
+    with track_run() as run:
+        with timed_stage("extract"):
+            record_page_timings([0.12345, 2.5])
+        with timed_stage("parse"):
+            pass
+
+    extract, parse = run.to_dict()["stages"]
+    assert extract["page_seconds"] == [0.1235, 2.5]
+    assert parse["page_seconds"] == []
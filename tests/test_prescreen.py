@@ -0,0 +1,64 @@
+import numpy as np
+
+from prescreen import PrescreenIndex, tokenize
+
+JD = "Senior sales manager for enterprise SaaS accounts, Salesforce and negotiation"
+CVS = [
+    ("sales", "Enterprise sales manager closing SaaS accounts, daily Salesforce user, strong negotiation"),
+    ("support", "Customer support agent answering tickets and chat for a SaaS product"),
+    ("chef", "Head chef running a restaurant kitchen and menu planning"),
+    ("account", "Account manager for enterprise accounts, renewals and negotiation"),
+]
+
+
+def test_tokenize_drops_stopwords_and_keeps_symbols():
+    assert tokenize("The C++ and C# developer") == ["c++", "c#", "developer"]
+
+
+def test_rank_puts_the_best_match_first_and_respects_filters():
+    index = PrescreenIndex()
+    index.add_documents(CVS)
+    ranked = index.rank(JD)
+
+    assert ranked[0][0] == "sales"
+    assert [doc_id for doc_id, _ in ranked][-1] == "chef"
+    assert [doc_id for doc_id, _ in index.rank(JD, top_n=2)] == [doc_id for doc_id, _ in ranked[:2]]
+    assert all(score >= 1.0 for _, score in index.rank(JD, min_score=1.0))
+    assert {doc_id for doc_id, _ in index.rank(JD, doc_ids=["chef", "support", "unknown"])} == {"chef", "support"}
+
+
+def test_adding_documents_in_batches_matches_one_batch():
+    whole = PrescreenIndex()
+    whole.add_documents(CVS)
+    batched = PrescreenIndex()
+    batched.add_documents(CVS[:2])
+    batched.add_documents(CVS[2:])
+    # Known ids are skipped rather than indexed twice
+    batched.add_documents(CVS[:1])
+
+    assert len(batched) == len(CVS)
+    assert batched.rank(JD) == whole.rank(JD)
+
+
+def test_rank_is_stable_after_save_load_and_add(tmp_path):
+    path = str(tmp_path / "prescreen.npz")
+    index = PrescreenIndex(k1=1.2, b=0.6)
+    index.add_documents(CVS[:3])
+    index.save(path)
+
+    loaded = PrescreenIndex.load(path)
+    assert (loaded.k1, loaded.b) == (1.2, 0.6)
+    assert loaded.rank(JD) == index.rank(JD)
+
+    index.add_documents(CVS[3:])
+    loaded.add_documents(CVS[3:])
+    assert loaded.rank(JD) == index.rank(JD)
+    assert "account" in loaded
+
+
+def test_equal_scores_keep_insertion_order():
+    index = PrescreenIndex()
+    index.add_documents([("first", "python developer"), ("second", "python developer"), ("third", "python developer")])
+    ranked = index.rank("python")
+    assert [doc_id for doc_id, _ in ranked] == ["first", "second", "third"]
+    assert np.allclose([score for _, score in ranked], ranked[0][1])
@@ -0,0 +1,12 @@
+import json
+
+import pytest
+
+from prompts import ENRICH_TEMPLATES, buildCV_enrichment_prompt, buildJD_enrichment_prompt
+
+
+@pytest.mark.parametrize("kind, build_prompt", [("cv", buildCV_enrichment_prompt), ("jd", buildJD_enrichment_prompt)])
+def test_enrichment_prompt_shows_the_validated_shape(kind, build_prompt):
+    # The answer is checked against ENRICH_TEMPLATES, so the prompt has to show that shape
+    prompt = build_prompt({"name": "Jane Doe", "enrichment parameters": []}, budget=3000)
+    assert json.dumps(ENRICH_TEMPLATES[kind], indent=2) in prompt
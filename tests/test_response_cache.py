@@ -0,0 +1,26 @@
+import json
+
+import app
+from routing import stage_models
+
+
+def test_repeated_cascade_calls_the_api_once_per_model(fake_openai):
+    # Skills as plain strings do not match the schema, so every model's answer escalates
+    answer = json.dumps({"name": "Jane Doe", "skills": ["Salesforce"]})
+    calls = fake_openai(lambda model, prompt: answer)
+
+    results = [app.call_openai_json("parse", "Resume: Jane Doe", "sk-test", True, app.PARSE_TEMPLATES["cv"]) for _ in range(3)]
+
+    assert [model for model, _ in calls] == stage_models("parse")
+    assert all(result["name"] == "Jane Doe" for result in results)
+
+
+def test_malformed_answer_is_not_cached(fake_openai):
+    cheap, *larger = stage_models("parse")
+    calls = fake_openai(lambda model, prompt: "Sorry, I cannot help with that." if model == cheap else json.dumps({"name": "Jane Doe"}))
+
+    for _ in range(2):
+        assert app.call_openai_json("parse", "Resume: Jane Doe", "sk-test")["name"] == "Jane Doe"
+
+    # The cheap model is asked again; the larger model's answer comes from the cache
+    assert [model for model, _ in calls] == [cheap, *larger, cheap]